@@ -0,0 +1,205 @@
+"""
+CacheManager throughput: the current CacheManager (one persistent WAL
+connection per thread, writes batched every flush_rows rows) against the
+original one, which opened a connection and committed on every call and is
+kept below verbatim as the reference.
+
+    python benchmarks/bench_cache_manager.py [--files N] [--repeat N]
+
+Each run caches --files files and one answer per file in a fresh temporary
+directory, then looks all of them up again after the writes are flushed.
+Reported rates are the best of --repeat runs.
+"""
+import argparse
+import hashlib
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'ollama_analyzer'))
+
+from cache_manager import CacheManager  # noqa: E402
+
+CONTENT = "export const value = computeSomething(input);\n" * 60
+METADATA = {'last_modified': 1.0, 'file_type': '.ts'}
+
+class BaselineCacheManager:
+    """CacheManager before persistent connections: one connection and one commit per call"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "cache.db"
+        self.init_database()
+
+    def init_database(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_cache (
+                    path TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    last_modified REAL,
+                    size INTEGER,
+                    file_type TEXT,
+                    compressed_content BLOB,
+                    metadata TEXT,
+                    last_analyzed TIMESTAMP
+                )
+            """)
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    file_path TEXT,
+                    question_hash TEXT,
+                    response TEXT,
+                    timestamp TIMESTAMP,
+                    model_name TEXT,
+                    PRIMARY KEY (file_path, question_hash, model_name)
+                )
+            """)
+
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON file_cache(content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_lookup ON analysis_cache(file_path, question_hash)")
+
+    def compress_content(self, content: str) -> bytes:
+        return zlib.compress(content.encode())
+
+    def decompress_content(self, compressed: bytes) -> str:
+        return zlib.decompress(compressed).decode()
+
+    def cache_file(self, file_path: str, content: str, metadata: Dict):
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        compressed = self.compress_content(content)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO file_cache
+                (path, content_hash, last_modified, size, file_type,
+                 compressed_content, metadata, last_analyzed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                file_path,
+                content_hash,
+                metadata['last_modified'],
+                len(content),
+                metadata['file_type'],
+                compressed,
+                json.dumps(metadata),
+                datetime.now().isoformat()
+            ))
+
+    def get_cached_file(self, file_path: str) -> Optional[Dict]:
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                "SELECT * FROM file_cache WHERE path = ?",
+                (file_path,)
+            )
+            row = cursor.fetchone()
+
+            if row:
+                return {
+                    'content': self.decompress_content(row[5]),
+                    'metadata': json.loads(row[6])
+                }
+        return None
+
+    def cache_analysis(self, file_path: str, question: str, response: str, model_name: str):
+        question_hash = hashlib.sha256(question.encode()).hexdigest()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO analysis_cache
+                (file_path, question_hash, response, timestamp, model_name)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                file_path,
+                question_hash,
+                response,
+                datetime.now().isoformat(),
+                model_name
+            ))
+
+    def get_cached_analysis(self, file_path: str, question: str, model_name: str) -> Optional[str]:
+        question_hash = hashlib.sha256(question.encode()).hexdigest()
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("""
+                SELECT response, timestamp
+                FROM analysis_cache
+                WHERE file_path = ? AND question_hash = ? AND model_name = ?
+            """, (file_path, question_hash, model_name))
+
+            result = cursor.fetchone()
+            if result:
+                return result[0]
+        return None
+
+def run_baseline(count):
+    directory = Path(tempfile.mkdtemp())
+    try:
+        cache = BaselineCacheManager(directory)
+        started = time.perf_counter()
+        for index in range(count):
+            path = f"src/file{index}.ts"
+            cache.cache_file(path, CONTENT + str(index), METADATA)
+            cache.cache_analysis(path, "Where is the session refreshed?", "NOT_RELEVANT", "llama3.2")
+        writes = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for index in range(count):
+            path = f"src/file{index}.ts"
+            cache.get_cached_file(path)
+            cache.get_cached_analysis(path, "Where is the session refreshed?", "llama3.2")
+        reads = time.perf_counter() - started
+        return writes, reads
+    finally:
+        shutil.rmtree(directory)
+
+def run_current(count):
+    directory = Path(tempfile.mkdtemp())
+    try:
+        cache = CacheManager(directory)
+        hashes = []
+        started = time.perf_counter()
+        for index in range(count):
+            path = f"src/file{index}.ts"
+            content_hash = cache.cache_file(path, CONTENT + str(index), METADATA)
+            cache.cache_analysis(path, content_hash, "Where is the session refreshed?", "NOT_RELEVANT", "llama3.2")
+            hashes.append(content_hash)
+        cache.flush()
+        writes = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for index, content_hash in enumerate(hashes):
+            cache.get_cached_file(f"src/file{index}.ts")
+            cache.get_cached_analysis(content_hash, "Where is the session refreshed?", "llama3.2")
+        reads = time.perf_counter() - started
+        cache.close()
+        return writes, reads
+    finally:
+        shutil.rmtree(directory)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=2000, help="files (and answers) to cache")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per implementation")
+    args = parser.parse_args()
+
+    operations = args.files * 2
+    print(f"{args.files} files, {operations} writes and {operations} lookups, "
+          f"Python {sys.version.split()[0]}, SQLite {sqlite3.sqlite_version}")
+    for label, run in (('baseline', run_baseline), ('current', run_current)):
+        results = [run(args.files) for _ in range(args.repeat)]
+        writes = min(result[0] for result in results)
+        reads = min(result[1] for result in results)
+        print(f"{label:>9}: {operations / writes:10,.0f} inserts/s   {operations / reads:10,.0f} lookups/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Dependency extraction throughput: extract_dependencies against the original
+five-pattern DependencyAnalyzer.analyze_file, which is kept below verbatim
+as the reference.
+
+    python benchmarks/bench_dependency_scan.py [--files N] [--repeat N] [--project DIR]
+
+Without --project a deterministic synthetic Next.js project is generated
+(pages with JSX, hooks, imports, comments, template literals and regexes).
+With --project the script, style and other files of a real tree are read
+instead. Reported times are the best of --repeat runs over all files.
+
+Per file, the literal-aware scanner costs more than the original patterns,
+which ignore comments, strings and regexes. The saving is in the pipeline:
+the last line times DependencyAnalyzer.sync_dependency_graph on a warm
+cache.db after --edited percent of the files changed, against re-parsing
+every file with the original patterns as each run used to.
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'ollama_analyzer'))
+
+from dependency_analyzer import DependencyAnalyzer, extract_dependencies  # noqa: E402
+
+SKIP_DIRS = {'node_modules', '.next', '.git', 'dist', 'build', '.cache'}
+
+def baseline_analyze_file(file_path, content):
+    """DependencyAnalyzer.analyze_file before the single-pass scanner"""
+    import_pattern = r'import\s+.+\s+from\s+[\'"]([^\'"]+)[\'"]'
+    export_pattern = r'export\s+(?:default\s+)?(?:function|const|class)\s+([A-Za-z0-9_]+)'
+    component_pattern = r'(?:function|const)\s+([A-Z][A-Za-z0-9_]*)'
+    hook_pattern = r'use[A-Z][A-Za-z0-9_]*'
+    style_pattern = r'import\s+[\'"](.+\.(?:css|scss|sass))[\'"]'
+
+    return (
+        re.findall(import_pattern, content),
+        re.findall(export_pattern, content),
+        re.findall(component_pattern, content),
+        re.findall(hook_pattern, content),
+        re.findall(style_pattern, content)
+    )
+
+HOOKS = ['useState', 'useEffect', 'useMemo', 'useCallback', 'useRef', 'useRouter', 'useAuth', 'useQuery']
+
+def synthetic_component(rng, index):
+    name = f"Widget{index}"
+    imports = [
+        "'use client';",
+        "import React, { useState, useEffect, useMemo } from 'react';",
+        "import Link from 'next/link';",
+        f"import {{ Button }} from '@/components/ui/button{rng.randrange(20)}';",
+        f"import {{ useAuth }} from '../hooks/useAuth{rng.randrange(20)}';",
+        f"import styles from './{name}.module.css';",
+    ]
+    body = [
+        "/**",
+        f" * {name} lists the current user's items and links to each one.",
+        " */",
+        f"interface {name}Props {{",
+        "  title: string;",
+        "  items: { id: string; label: string }[];",
+        "}",
+        "",
+        f"const SLUG_RE = /[^a-z0-9\\/-]+/g;",
+        "",
+        f"export default function {name}({{ title, items }}: {name}Props) {{",
+    ]
+    for _ in range(rng.randrange(3, 8)):
+        hook = rng.choice(HOOKS)
+        body.append(f"  const value{rng.randrange(1000)} = {hook}(() => items.length, [items]);")
+    body += [
+        "  const [query, setQuery] = useState('');",
+        "  // Filter as the user types; an empty query shows everything",
+        "  const visible = useMemo(",
+        "    () => items.filter((item) => item.label.toLowerCase().includes(query.toLowerCase())),",
+        "    [items, query]",
+        "  );",
+        "",
+        "  return (",
+        f"    <section className={{styles.{name.lower()}}}>",
+        "      <h2>{title}</h2>",
+        "      <input value={query} onChange={(e) => setQuery(e.target.value)} placeholder=\"Search...\" />",
+        "      <ul>",
+        "        {visible.map((item) => (",
+        "          <li key={item.id} className={`item ${item.id === query ? 'active' : ''}`}>",
+        "            <Link href={`/items/${item.id.replace(SLUG_RE, '-')}`}>{item.label}</Link>",
+        "          </li>",
+        "        ))}",
+        "      </ul>",
+        "      <Button onClick={() => setQuery('')}>Clear</Button>",
+        "    </section>",
+        "  );",
+        "}",
+        "",
+        f"export const {name}Count = ({{ items }}: {name}Props) => <span>{{items.length}}</span>;",
+    ]
+    return '\n'.join(imports + [''] + body) + '\n'
+
+def synthetic_project(count, seed=0):
+    rng = random.Random(seed)
+    files = {}
+    for index in range(count):
+        kind = rng.random()
+        if kind < 0.7:
+            files[f"src/components/Widget{index}.tsx"] = synthetic_component(rng, index)
+        elif kind < 0.85:
+            files[f"src/lib/util{index}.ts"] = (
+                "import { z } from 'zod';\n"
+                f"export const schema{index} = z.object({{ id: z.string() }});\n"
+                f"export function parse{index}(input: unknown) {{\n"
+                f"  return schema{index}.parse(input);\n"
+                "}\n"
+            )
+        elif kind < 0.95:
+            files[f"src/styles/s{index}.module.css"] = (
+                "@import './base.css';\n" + ''.join(f".c{i} {{ color: #{i:06x}; }}\n" for i in range(40))
+            )
+        else:
+            files[f"public/data{index}.json"] = '{"items": [' + ','.join(f'{{"id": {i}}}' for i in range(300)) + ']}'
+    return files
+
+def project_files(root):
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            if filename.endswith(('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.css', '.scss', '.json')):
+                path = os.path.join(dirpath, filename)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        files[os.path.relpath(path, root)] = f.read()
+                except (OSError, UnicodeDecodeError):
+                    continue
+    return files
+
+def best_of(func, files, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for file_path, content in files.items():
+            func(file_path, content)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def time_sync(files, edited_percent, repeat):
+    """Best warm sync_dependency_graph time after editing edited_percent of the files"""
+    rng = random.Random(1)
+    edited = rng.sample(sorted(files), max(1, len(files) * edited_percent // 100))
+    best = float('inf')
+    with tempfile.TemporaryDirectory() as root:
+        analyzer = DependencyAnalyzer(Path(root), cache_dir=Path(root) / '.cache')
+        contents = dict(files)
+        hashes = {path: hashlib.md5(content.encode()).hexdigest() for path, content in contents.items()}
+        analyzer.sync_dependency_graph(hashes, contents.get)
+        for run in range(repeat):
+            for path in edited:
+                contents[path] = files[path] + f"\n// edit {run}\n"
+                hashes[path] = hashlib.md5(contents[path].encode()).hexdigest()
+            started = time.perf_counter()
+            analyzer.sync_dependency_graph(hashes, contents.get)
+            best = min(best, time.perf_counter() - started)
+    return best, len(edited)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=500, help="synthetic files to generate")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per implementation")
+    parser.add_argument('--project', help="read files from this directory instead")
+    parser.add_argument('--edited', type=int, default=1, help="percent of files edited before the warm sync")
+    args = parser.parse_args()
+
+    files = project_files(args.project) if args.project else synthetic_project(args.files)
+    size = sum(len(content) for content in files.values())
+    print(f"{len(files)} files, {size / 1024:.0f} KB, Python {sys.version.split()[0]}")
+
+    groups = {'all files': files}
+    scripts = {path: content for path, content in files.items() if path.endswith(('.tsx', '.jsx'))}
+    if scripts and len(scripts) < len(files):
+        groups['.tsx/.jsx only'] = scripts
+
+    for label, group in groups.items():
+        baseline = best_of(baseline_analyze_file, group, args.repeat)
+        current = best_of(extract_dependencies, group, args.repeat)
+        print(f"{label:>15}: baseline {baseline * 1000:8.1f} ms   "
+              f"extract_dependencies {current * 1000:8.1f} ms   speed-up {baseline / current:.2f}x")
+
+    baseline = best_of(baseline_analyze_file, files, args.repeat)
+    synced, edited = time_sync(files, args.edited, args.repeat)
+    print(f"{'warm sync':>15}: baseline {baseline * 1000:8.1f} ms   "
+          f"sync ({edited} edited) {synced * 1000:8.1f} ms   speed-up {baseline / synced:.2f}x")
+
+if __name__ == '__main__':
+    main()
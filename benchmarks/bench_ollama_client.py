@@ -0,0 +1,120 @@
+"""
+Ollama request overhead: the pooled keep-alive OllamaClient against a bare
+requests.post per call, which is how every caller talked to Ollama before
+ollama_client.py.
+
+    python benchmarks/bench_ollama_client.py [--requests N] [--threads N] [--delay-ms MS] [--url URL]
+
+Without --url a local stub of /api/generate answers every request after
+--delay-ms, so the numbers show connection and session overhead rather
+than model time. With --url the requests go to a real Ollama server
+(--model picks the model, keep the prompt tiny). Reported times are the
+best of --repeat runs.
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'ollama_analyzer'))
+
+from ollama_client import OllamaClient  # noqa: E402
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate like a non-streaming Ollama, keeping connections alive"""
+
+    protocol_version = 'HTTP/1.1'
+    delay = 0.0
+
+    def setup(self):
+        super().setup()
+        # As Go's net/http does; otherwise headers and body written separately stall on delayed ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.delay:
+            time.sleep(self.delay)
+        body = json.dumps({'model': 'stub', 'response': 'NOT_RELEVANT', 'done': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub(delay: float):
+    handler = type('Handler', (StubHandler,), {'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def baseline_generate(base_url, model, prompt):
+    """A new connection per call, as the callers did before the shared client"""
+    response = requests.post(
+        f"{base_url}/api/generate",
+        json={"model": model, "prompt": prompt, "stream": False},
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json().get('response', '')
+
+def timed(call, count, threads):
+    started = time.perf_counter()
+    if threads == 1:
+        for _ in range(count):
+            call()
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(call) for _ in range(count)]:
+                future.result()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help="requests per run")
+    parser.add_argument('--threads', type=int, default=4, help="concurrent callers for the parallel run")
+    parser.add_argument('--delay-ms', type=float, default=0.0, help="stub response delay")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per implementation")
+    parser.add_argument('--url', help="a real Ollama server instead of the stub")
+    parser.add_argument('--model', default='llama3.2', help="model for --url")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        server, base_url = start_stub(args.delay_ms / 1000)
+
+    client = OllamaClient(base_url, max_connections=max(args.threads, 1))
+    calls = {
+        'requests.post': lambda: baseline_generate(base_url, args.model, 'hi'),
+        'OllamaClient': lambda: client.generate(args.model, 'hi')
+    }
+    print(f"{args.requests} requests to {'stub' if server else base_url}, Python {sys.version.split()[0]}")
+    try:
+        for threads in sorted({1, args.threads}):
+            times = {
+                label: min(timed(call, args.requests, threads) for _ in range(args.repeat))
+                for label, call in calls.items()
+            }
+            baseline, pooled = times['requests.post'], times['OllamaClient']
+            print(f"{threads:>2} thread(s): requests.post {baseline * 1000 / args.requests:7.3f} ms/req   "
+                  f"OllamaClient {pooled * 1000 / args.requests:7.3f} ms/req   speed-up {baseline / pooled:.2f}x")
+    finally:
+        client.close()
+        if server is not None:
+            server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import os
+import sys
 import json
 import requests
 from typing import Optional
 import threading
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ollama_analyzer'))
+from ollama_client import close_clients, get_client
+
 class OllamaAnalyzerGUI:
     def __init__(self, root):
         self.root = root
@@ -85,11 +89,12 @@ class OllamaAnalyzerGUI:
     def connect_to_ollama(self):
         try:
             # First check if Ollama service is running
-            response = requests.get(f"{self.base_url.get()}/api/version")
+            client = get_client(self.base_url.get(), timeout=None)
+            response = client.request('GET', '/api/version', retry=False)
             if response.status_code == 200:
                 # Then check if the specified model is available
-                model_response = requests.post(
-                    f"{self.base_url.get()}/api/generate",
+                model_response = client.request(
+                    'POST', '/api/generate',
                     json={"model": self.model_name.get(), "prompt": "test", "stream": False}
                 )
                 if model_response.status_code == 200:
@@ -191,11 +196,7 @@ class OllamaAnalyzerGUI:
             self.progress_bar["value"] = 0
             
     def verify_connection(self):
-        try:
-            response = requests.get(f"{self.base_url.get()}/api/version")
-            return response.status_code == 200
-        except:
-            return False
+        return get_client(self.base_url.get(), timeout=None).is_available()
             
     def start_analysis(self):
         if self.is_analyzing:
@@ -246,21 +247,8 @@ class OllamaProjectAnalyzer:
             return ""
             
     def query_ollama(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        url = f"{self.base_url}/api/generate"
-        
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": False
-        }
-        
-        if system_prompt:
-            payload["system"] = system_prompt
-            
         try:
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            return response.json()['response']
+            return get_client(self.base_url, timeout=None).generate(self.model_name, prompt, system=system_prompt)
         except Exception as e:
             print(f"Error querying Ollama: {str(e)}")
             return ""
@@ -288,4 +276,5 @@ Please provide a detailed analysis focusing specifically on this file and the qu
 if __name__ == "__main__":
     root = tk.Tk()
     app = OllamaAnalyzerGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    close_clients()
\ No newline at end of file
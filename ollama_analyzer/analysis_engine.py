@@ -0,0 +1,228 @@
+import logging
+import queue
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config import AnalyzerConfig
+from cache_manager import CacheManager
+
+logger = logging.getLogger('AnalysisEngine')
+
+@dataclass
+class FileAnalysisResult:
+    file_path: str
+    response: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+class DependencyScheduler:
+    """
+    Hands out files so that each comes after the files it imports (leaves
+    first), as soon as those are done rather than level by level. When an
+    import cycle leaves nothing ready and nothing running, the waiting file
+    with the fewest unfinished imports is released. Without a graph files
+    come out in the given order.
+    """
+
+    def __init__(self, files: List[str], dependency_graph=None):
+        self.order = list(dict.fromkeys(files))
+        self.waiting: Dict[str, set] = {file_path: set() for file_path in self.order}
+        self.dependents: Dict[str, List[str]] = defaultdict(list)
+        if dependency_graph is not None:
+            for file_path in self.order:
+                if file_path in dependency_graph:
+                    for imported in dependency_graph.successors(file_path):
+                        if imported in self.waiting and imported != file_path:
+                            self.waiting[file_path].add(imported)
+                            self.dependents[imported].append(file_path)
+        self.ready = deque(file_path for file_path in self.order if not self.waiting[file_path])
+        self.released = set(self.ready)
+
+    def next(self, idle: bool) -> Optional[str]:
+        """The next file to start; idle means nothing is in flight, so a cycle may be broken"""
+        if not self.ready and idle and len(self.released) < len(self.order):
+            blocked = [file_path for file_path in self.order if file_path not in self.released]
+            file_path = min(blocked, key=lambda path: len(self.waiting[path]))
+            self.released.add(file_path)
+            return file_path
+        return self.ready.popleft() if self.ready else None
+
+    def done(self, file_path: str):
+        for dependent in self.dependents.get(file_path, ()):
+            waiting = self.waiting[dependent]
+            waiting.discard(file_path)
+            if not waiting and dependent not in self.released:
+                self.released.add(dependent)
+                self.ready.append(dependent)
+
+class AnalysisEngine:
+    """
+    Runs per-file Ollama queries through a bounded worker pool. With a
+    summarizer, each file is first summarized (or its cached summary loaded)
+    so files that import it see the summary; with a dependency graph, files
+    are scheduled leaves first so those summaries exist when needed. With a
+    context_builder, each prompt carries its imports' context, which is
+    passed to query_fn, and the cache key carries the imports' signatures
+    (ContextBuilder.context_hash). Setting stop_event (or calling stop) stops
+    dispatch, and files already started skip any model call not yet made.
+    """
+
+    def __init__(self, project_path: Path, config: AnalyzerConfig, cache: CacheManager,
+                 query_fn: Callable[[str, str, str, str], str], model_name: str,
+                 result_queue: Optional[queue.Queue] = None, summarizer=None, dependency_graph=None,
+                 context_builder=None, stop_event: Optional[threading.Event] = None):
+        self.project_path = project_path
+        self.config = config
+        self.cache = cache
+        self.query_fn = query_fn
+        self.model_name = model_name
+        self.result_queue = result_queue if result_queue is not None else queue.Queue()
+        self.max_workers = max(1, config.PARALLEL_PROCESSES)
+        self.prompt_version = config.PROMPT_VERSION
+        self.summarizer = summarizer
+        self.dependency_graph = dependency_graph
+        self.context_builder = context_builder
+        self.cache_hits = 0
+        self._stop_event = stop_event if stop_event is not None else threading.Event()
+
+    def stop(self):
+        """Stop dispatching new files; in-flight requests are allowed to finish"""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    @staticmethod
+    def _relevant(response: Optional[str]) -> Optional[str]:
+        if response and response.strip() != 'NOT_RELEVANT':
+            return response
+        return None
+
+    @staticmethod
+    def _read(abs_path: Path) -> str:
+        with open(abs_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _context(self, file_path: str) -> str:
+        return self.context_builder.build([file_path]) if self.context_builder is not None else ''
+
+    def _context_hash(self, file_path: str) -> str:
+        return self.context_builder.context_hash(file_path) if self.context_builder is not None else ''
+
+    def has_cached_answer(self, file_path: str, question: str) -> bool:
+        """
+        Whether analyze_file would answer from the cache: the file is unchanged
+        since it was last hashed and an answer exists for its imports' signatures
+        """
+        try:
+            content_hash = self.cache.get_unchanged_hash(file_path, (self.project_path / file_path).stat())
+        except OSError:
+            return False
+        if content_hash is None:
+            return False
+        return self.cache.get_cached_analysis(
+            content_hash, question, self.model_name, self.prompt_version, self._context_hash(file_path),
+            count=False
+        ) is not None
+
+    def analyze_file(self, file_path: str, question: str) -> FileAnalysisResult:
+        """Analyze a single file, consulting the cache first"""
+        try:
+            abs_path = self.project_path / file_path
+            stat_result = abs_path.stat()
+
+            # Unchanged since the last run: skip reading, hashing and compressing
+            content = None
+            content_hash = self.cache.get_unchanged_hash(file_path, stat_result)
+            if content_hash is None:
+                content = self._read(abs_path)
+                metadata = {
+                    'last_modified': stat_result.st_mtime,
+                    'file_type': abs_path.suffix
+                }
+                content_hash = self.cache.cache_file(file_path, content, metadata, stat_result)
+
+            # Built only when a prompt needs it; the keys use the imports' signatures instead
+            context = None
+            context_hash = self._context_hash(file_path)
+
+            # Summarized even when the answer is cached, since dependents may not be;
+            # once stopped a cached answer is still returned, but nothing new is generated
+            if (self.summarizer is not None and not self.stopped
+                    and self.summarizer.get(file_path, content_hash) is None):
+                if content is None:
+                    content = self._read(abs_path)
+                context = self._context(file_path)
+                self.summarizer.summarize(file_path, content, content_hash, context)
+
+            cached_response = self.cache.get_cached_analysis(
+                content_hash, question, self.model_name, self.prompt_version, context_hash
+            )
+            if cached_response:
+                return FileAnalysisResult(file_path, self._relevant(cached_response), cached=True)
+
+            if self.stopped:
+                return FileAnalysisResult(file_path, error="Stopped")
+            if content is None:
+                content = self._read(abs_path)
+            if context is None:
+                context = self._context(file_path)
+            response = self.query_fn(file_path, content, question, context)
+            if response:
+                # NOT_RELEVANT answers are cached too, so unchanged files are never re-asked
+                self.cache.cache_analysis(
+                    file_path, content_hash, question, response, self.model_name, self.prompt_version,
+                    context_hash
+                )
+            return FileAnalysisResult(file_path, self._relevant(response))
+
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path}: {str(e)}")
+            return FileAnalysisResult(file_path, error=str(e))
+
+    def run(self, files: List[str], question: str) -> Dict[str, str]:
+        """
+        Analyze files concurrently, in dependency order when a graph was
+        given, and return the relevant responses.
+        Each FileAnalysisResult is also put on result_queue as soon as it is ready,
+        followed by a None sentinel once the run has finished.
+        """
+        results = {}
+        pending = set()
+        scheduler = DependencyScheduler(files, self.dependency_graph)
+        # Keep at most two requests queued per worker so a stop takes effect quickly
+        max_pending = self.max_workers * 2
+
+        logger.info(f"Analyzing {len(files)} files with {self.max_workers} workers")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix='analysis') as executor:
+                while True:
+                    while not self.stopped and len(pending) < max_pending:
+                        file_path = scheduler.next(idle=not pending)
+                        if file_path is None:
+                            break
+                        pending.add(executor.submit(self.analyze_file, file_path, question))
+
+                    if not pending:
+                        break
+
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        scheduler.done(result.file_path)
+                        if result.cached:
+                            self.cache_hits += 1
+                        if result.response:
+                            results[result.file_path] = result.response
+                        self.result_queue.put(result)
+        finally:
+            self.result_queue.put(None)
+
+        return results
@@ -1,18 +1,22 @@
 import json
-import requests
+from ollama_client import get_client, GenerationCancelled
 
 class AnalysisSummarizer:
-    def __init__(self, base_url: str, model_name: str):
+    def __init__(self, base_url: str, model_name: str, config=None):
         self.base_url = base_url
         self.model_name = model_name
+        self.client = get_client(base_url, config)
         
-    def summarize_results(self, results_file: str = None, results_dict: dict = None, original_query: str = None) -> str:
+    def summarize_results(self, results_file: str = None, results_dict: dict = None, original_query: str = None,
+                          on_token=None, cancel_event=None) -> str:
         """
         Summarize analysis results and get final conclusion using LLM
         Args:
             results_file: Path to JSON results file
             results_dict: Dictionary containing analysis results
             original_query: Original user query
+            on_token: Optional callback receiving conclusion tokens as they stream in
+            cancel_event: Optional threading.Event that stops a streaming conclusion
         """
         if results_file:
             with open(results_file, 'r') as f:
@@ -24,7 +28,7 @@ class AnalysisSummarizer:
         summary = self._create_summary(results)
         
         # Get final conclusion using LLM
-        conclusion = self._get_conclusion(summary, original_query)
+        conclusion = self._get_conclusion(summary, original_query, on_token, cancel_event)
         
         return conclusion
     
@@ -78,7 +82,7 @@ class AnalysisSummarizer:
                 
         return {k: v for k, v in groups.items() if v}
     
-    def _get_conclusion(self, summary: str, query: str) -> str:
+    def _get_conclusion(self, summary: str, query: str, on_token=None, cancel_event=None) -> str:
         """Get final conclusion using LLM"""
         system_prompt = """You are a Next.js expert analyzing project files.
 Provide a clear, actionable conclusion based on the analysis results.
@@ -99,20 +103,22 @@ Include:
 4. Any potential impacts or considerations
 """
 
+        tokens = []
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "system": system_prompt,
-                    "stream": False
-                },
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            return response.json()['response']
-            
+            if on_token is None:
+                return self.client.generate(self.model_name, prompt, system=system_prompt)
+
+            for token in self.client.generate_stream(
+                self.model_name, prompt, system=system_prompt, cancel_event=cancel_event
+            ):
+                tokens.append(token)
+                on_token(token)
+            return "".join(tokens)
+
+        except GenerationCancelled:
+            return "".join(tokens)
         except Exception as e:
-            return f"Error getting conclusion: {str(e)}"
\ No newline at end of file
+            error = f"Error getting conclusion: {str(e)}"
+            if on_token is not None:
+                on_token(f"\n{error}")
+            return error
\ No newline at end of file
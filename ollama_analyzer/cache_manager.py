@@ -1,21 +1,100 @@
+import logging
+import os
+import re
 import sqlite3
 import hashlib
+import threading
+import time
+import unicodedata
 import zlib
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List, Sequence
 import pickle
 import json
 
+import numpy as np
+
+logger = logging.getLogger('CacheManager')
+
+# Tables whose rows count towards max_size_mb and are expired/evicted
+CACHE_TABLES = ('file_cache', 'analysis_cache', 'summary_cache')
+
+# Words, identifiers and paths such as 'page.tsx' or 'app/api'; everything else is punctuation
+_QUESTION_TERM_RE = re.compile(r'[\w$]+(?:[./-][\w$]+)*')
+# Words that never change what a question asks for
+FILLER_WORDS = frozenset({'a', 'an', 'the', 'please', 'kindly'})
+
+# Previously asked questions kept for similarity matching
+QUESTION_HISTORY = 1000
+
 class CacheManager:
-    def __init__(self, cache_dir: Path):
+    """
+    SQLite-backed cache for file contents, analysis responses and
+    question-independent file summaries.
+    Each thread keeps one long-lived connection to a WAL-mode database, and
+    writes are buffered and committed in batches of flush_rows rows or every
+    flush_interval_ms milliseconds, whichever comes first.
+
+    Entries older than expiry_hours are treated as misses and deleted, and the
+    least recently used entries are evicted once the stored bytes exceed
+    max_size_mb, stopping as soon as they fit again. Eviction runs in small
+    indexed batches after each flush. Only the tables in CACHE_TABLES count
+    towards max_size_mb; the search, dependency and embedding indexes that
+    share cache.db hold one record per current project file, are pruned on
+    every sync, and are excluded.
+    """
+
+    EVICTION_BATCH = 200
+
+    def __init__(self, cache_dir: Path, flush_rows: int = 100, flush_interval_ms: int = 500,
+                 expiry_hours: float = 24, max_size_mb: float = 1024):
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.db_path = self.cache_dir / "cache.db"
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.expiry = timedelta(hours=expiry_hours)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        # Pending rows keyed by primary key so reads can see unflushed writes
+        self._pending_files: Dict[str, tuple] = {}
+        self._pending_analyses: Dict[tuple, tuple] = {}
+        self._pending_summaries: Dict[tuple, tuple] = {}
+        # Last-access updates and hit/miss counters are batched the same way
+        self._touched_files: Dict[str, float] = {}
+        self._touched_analyses: Dict[tuple, float] = {}
+        self._touched_summaries: Dict[tuple, float] = {}
+        self._counters = {'hits': 0, 'misses': 0}
+        self._write_lock = threading.RLock()
+        # Question hash -> hash of the earlier question it was matched to
+        self._question_aliases: Dict[str, str] = {}
+        self._last_flush = time.monotonic()
+
         self.init_database()
 
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-16000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            # Lets REPLACE fire the delete triggers that keep the byte total current
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
     def init_database(self):
-        with sqlite3.connect(self.db_path) as conn:
+        conn = self._get_connection()
+        with conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS file_cache (
                     path TEXT PRIMARY KEY,
@@ -29,19 +108,105 @@ class CacheManager:
                 )
             """)
 
+            # Analyses used to be keyed by file path, which served stale answers
+            # after edits; those rows cannot be trusted, so drop the old table.
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(analysis_cache)")]
+            if columns and 'content_hash' not in columns:
+                conn.execute("DROP TABLE analysis_cache")
+
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS analysis_cache (
-                    file_path TEXT,
+                    content_hash TEXT,
                     question_hash TEXT,
+                    model_name TEXT,
+                    prompt_version INTEGER,
+                    file_path TEXT,
                     response TEXT,
                     timestamp TIMESTAMP,
+                    PRIMARY KEY (content_hash, question_hash, model_name, prompt_version)
+                )
+            """)
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    content_hash TEXT,
                     model_name TEXT,
-                    PRIMARY KEY (file_path, question_hash, model_name)
+                    prompt_version INTEGER,
+                    file_path TEXT,
+                    summary TEXT,
+                    timestamp TIMESTAMP,
+                    byte_size INTEGER,
+                    last_accessed REAL,
+                    PRIMARY KEY (content_hash, model_name, prompt_version)
                 )
             """)
 
+            # Size and access tracking for expiry and LRU eviction
+            for table, payload in (
+                ('file_cache', "length(path) + length(compressed_content) + length(metadata)"),
+                ('analysis_cache', "length(file_path) + length(response)")
+            ):
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                if 'byte_size' not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN byte_size INTEGER")
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN last_accessed REAL")
+                    conn.execute(f"UPDATE {table} SET byte_size = {payload}, last_accessed = ?", (time.time(),))
+
+            # Stat signature for skipping unchanged files without reading them
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(file_cache)")]
+            if 'mtime_ns' not in columns:
+                conn.execute("ALTER TABLE file_cache ADD COLUMN mtime_ns INTEGER")
+                conn.execute("ALTER TABLE file_cache ADD COLUMN st_size INTEGER")
+                conn.execute("ALTER TABLE file_cache ADD COLUMN inode INTEGER")
+
             conn.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON file_cache(content_hash)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_lookup ON analysis_cache(file_path, question_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_accessed ON file_cache(last_accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_analyzed ON file_cache(last_analyzed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_accessed ON analysis_cache(last_accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_timestamp ON analysis_cache(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_accessed ON summary_cache(last_accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_timestamp ON summary_cache(timestamp)")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS question_log (
+                    question_hash TEXT PRIMARY KEY,
+                    question TEXT,
+                    embedding BLOB,
+                    embedding_model TEXT,
+                    last_asked REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_question_asked ON question_log(last_asked)")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER
+                )
+            """)
+            conn.execute("""
+                INSERT OR IGNORE INTO cache_stats (key, value)
+                SELECT 'bytes',
+                       (SELECT COALESCE(SUM(byte_size), 0) FROM file_cache) +
+                       (SELECT COALESCE(SUM(byte_size), 0) FROM analysis_cache) +
+                       (SELECT COALESCE(SUM(byte_size), 0) FROM summary_cache)
+            """)
+            for key in ('hits', 'misses', 'evictions', 'expired', 'question_matches'):
+                conn.execute("INSERT OR IGNORE INTO cache_stats (key, value) VALUES (?, 0)", (key,))
+
+            for table in CACHE_TABLES:
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_bytes_insert AFTER INSERT ON {table}
+                    BEGIN
+                        UPDATE cache_stats SET value = value + COALESCE(NEW.byte_size, 0) WHERE key = 'bytes';
+                    END
+                """)
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_bytes_delete AFTER DELETE ON {table}
+                    BEGIN
+                        UPDATE cache_stats SET value = value - COALESCE(OLD.byte_size, 0) WHERE key = 'bytes';
+                    END
+                """)
 
     def compress_content(self, content: str) -> bytes:
         return zlib.compress(content.encode())
@@ -49,69 +214,414 @@ class CacheManager:
     def decompress_content(self, compressed: bytes) -> str:
         return zlib.decompress(compressed).decode()
 
-    def cache_file(self, file_path: str, content: str, metadata: Dict):
-        content_hash = hashlib.sha256(content.encode()).hexdigest()
+    @staticmethod
+    def hash_content(content: str) -> str:
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """
+        Canonical form of a question: Unicode-normalized, case-folded, with
+        punctuation, extra whitespace and filler words dropped, so 'Change the
+        navbar logo ' and 'change navbar logo' are the same question
+        """
+        text = unicodedata.normalize('NFKC', question).casefold()
+        return ' '.join(term for term in _QUESTION_TERM_RE.findall(text) if term not in FILLER_WORDS)
+
+    @classmethod
+    def hash_question(cls, question: str) -> str:
+        return hashlib.sha256(cls.normalize_question(question).encode()).hexdigest()
+
+    def _question_key(self, question: str) -> str:
+        """Question hash used for analysis keys, following a match made by resolve_question"""
+        question_hash = self.hash_question(question)
+        return self._question_aliases.get(question_hash, question_hash)
+
+    def resolve_question(self, question: str,
+                         embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+                         embedding_model: str = "", threshold: float = 0.0) -> Optional[str]:
+        """
+        Record a question before its analyses are looked up. With embed_fn and
+        a threshold above 0, a question not asked before is embedded and, if
+        its cosine similarity to an earlier question (embedded with the same
+        model) reaches the threshold, it reuses that question's cached
+        analyses. Returns the earlier question when such a match was made.
+        """
+        normalized = self.normalize_question(question)
+        question_hash = self.hash_question(question)
+        conn = self._get_connection()
+
+        with self._write_lock:
+            if conn.execute("SELECT 1 FROM question_log WHERE question_hash = ?", (question_hash,)).fetchone():
+                with conn:
+                    conn.execute("UPDATE question_log SET last_asked = ? WHERE question_hash = ?",
+                                 (time.time(), question_hash))
+                return None
+
+            vector = None
+            if embed_fn is not None and threshold > 0 and normalized:
+                try:
+                    vector = np.asarray(embed_fn(normalized), dtype=np.float32)
+                    vector /= np.linalg.norm(vector) or 1.0
+                except Exception as e:
+                    # Exact matching still works without embeddings
+                    logger.warning(f"Error embedding question: {e}")
+                    vector = None
+
+            if vector is not None:
+                rows = conn.execute(
+                    "SELECT question_hash, question, embedding FROM question_log WHERE embedding_model = ?",
+                    (embedding_model,)
+                ).fetchall()
+                rows = [row for row in rows if row[2] and len(row[2]) == vector.nbytes]
+                if rows:
+                    matrix = np.frombuffer(b''.join(row[2] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+                    similarities = matrix @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= threshold:
+                        self._question_aliases[question_hash] = rows[best][0]
+                        with conn:
+                            conn.execute("UPDATE question_log SET last_asked = ? WHERE question_hash = ?",
+                                         (time.time(), rows[best][0]))
+                            conn.execute(
+                                "UPDATE cache_stats SET value = value + 1 WHERE key = 'question_matches'"
+                            )
+                        return rows[best][1]
+
+            with conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO question_log
+                    (question_hash, question, embedding, embedding_model, last_asked)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    question_hash, normalized,
+                    vector.tobytes() if vector is not None else None,
+                    embedding_model if vector is not None else None,
+                    time.time()
+                ))
+                conn.execute("""
+                    DELETE FROM question_log WHERE question_hash NOT IN (
+                        SELECT question_hash FROM question_log ORDER BY last_asked DESC LIMIT ?
+                    )
+                """, (QUESTION_HISTORY,))
+        return None
+
+    def cache_file(self, file_path: str, content: str, metadata: Dict,
+                   stat_result: Optional[os.stat_result] = None) -> str:
+        """
+        Cache a file's content and return its content hash.
+        Passing the file's stat_result records its (mtime, size, inode) signature
+        for get_unchanged_hash.
+        """
+        content_hash = self.hash_content(content)
         compressed = self.compress_content(content)
+        metadata_json = json.dumps(metadata)
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO file_cache 
-                (path, content_hash, last_modified, size, file_type, 
-                 compressed_content, metadata, last_analyzed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                file_path,
-                content_hash,
-                metadata['last_modified'],
-                len(content),
-                metadata['file_type'],
-                compressed,
-                json.dumps(metadata),
-                datetime.now().isoformat()
-            ))
+        row = (
+            file_path,
+            content_hash,
+            metadata['last_modified'],
+            len(content),
+            metadata['file_type'],
+            compressed,
+            metadata_json,
+            datetime.now().isoformat(),
+            len(file_path) + len(compressed) + len(metadata_json),
+            time.time()
+        ) + (
+            (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+            if stat_result is not None else (None, None, None)
+        )
+        with self._write_lock:
+            self._pending_files[file_path] = row
+            self._maybe_flush()
+        return content_hash
+
+    def _expiry_cutoff(self) -> str:
+        return (datetime.now() - self.expiry).isoformat()
+
+    def get_unchanged_hash(self, file_path: str, stat_result: os.stat_result) -> Optional[str]:
+        """
+        Return the cached content hash if the file's mtime, size and inode still
+        match the cached row, so the caller can skip reading and hashing it.
+        """
+        signature = (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+        with self._write_lock:
+            pending = self._pending_files.get(file_path)
+        if pending:
+            row = (pending[1],) + pending[10:13]
+        else:
+            row = self._get_connection().execute("""
+                SELECT content_hash, mtime_ns, st_size, inode FROM file_cache
+                WHERE path = ? AND last_analyzed >= ?
+            """, (file_path, self._expiry_cutoff())).fetchone()
+
+        if row and tuple(row[1:]) == signature:
+            with self._write_lock:
+                self._touched_files[file_path] = time.time()
+            return row[0]
+        return None
 
     def get_cached_file(self, file_path: str) -> Optional[Dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT * FROM file_cache WHERE path = ?",
-                (file_path,)
-            )
-            row = cursor.fetchone()
-
-            if row:
-                return {
-                    'content': self.decompress_content(row[5]),
-                    'metadata': json.loads(row[6])
-                }
+        with self._write_lock:
+            pending = self._pending_files.get(file_path)
+        if pending:
+            row = (pending[5], pending[6])
+        else:
+            row = self._get_connection().execute(
+                "SELECT compressed_content, metadata FROM file_cache WHERE path = ? AND last_analyzed >= ?",
+                (file_path, self._expiry_cutoff())
+            ).fetchone()
+
+        if row:
+            with self._write_lock:
+                self._touched_files[file_path] = time.time()
+            return {
+                'content': self.decompress_content(row[0]),
+                'metadata': json.loads(row[1])
+            }
         return None
 
-    def cache_analysis(self, file_path: str, question: str, response: str, model_name: str):
-        question_hash = hashlib.sha256(question.encode()).hexdigest()
+    @classmethod
+    def _with_context(cls, content_hash: str, context_hash: str) -> str:
+        """Fold other prompt input (e.g. the imports shown with the file) into a content key"""
+        return cls.hash_content(f"{content_hash}:{context_hash}") if context_hash else content_hash
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO analysis_cache 
-                (file_path, question_hash, response, timestamp, model_name)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                file_path,
-                question_hash,
-                response,
-                datetime.now().isoformat(),
-                model_name
-            ))
-
-    def get_cached_analysis(self, file_path: str, question: str, model_name: str) -> Optional[str]:
-        question_hash = hashlib.sha256(question.encode()).hexdigest()
-
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
+    def _analysis_key(self, content_hash: str, question: str, model_name: str,
+                      prompt_version: int, context_hash: str) -> tuple:
+        return (self._with_context(content_hash, context_hash), self._question_key(question),
+                model_name, prompt_version)
+
+    def cache_analysis(self, file_path: str, content_hash: str, question: str, response: str,
+                       model_name: str, prompt_version: int = 1, context_hash: str = ""):
+        """
+        Cache a response keyed by file content rather than path, so edited files
+        miss and moved or duplicated files hit. context_hash identifies any
+        other input the prompt carried, so a change there misses too.
+        """
+        key = self._analysis_key(content_hash, question, model_name, prompt_version, context_hash)
+        row = key + (
+            file_path,
+            response,
+            datetime.now().isoformat(),
+            len(file_path) + len(response),
+            time.time()
+        )
+        with self._write_lock:
+            self._pending_analyses[key] = row
+            self._maybe_flush()
+
+    def get_cached_analysis(self, content_hash: str, question: str, model_name: str,
+                            prompt_version: int = 1, context_hash: str = "",
+                            count: bool = True) -> Optional[str]:
+        """
+        The cached response, if any. count=False is for checks that precede
+        the real lookup, so a file is not counted twice in the hit rate.
+        """
+        key = self._analysis_key(content_hash, question, model_name, prompt_version, context_hash)
+
+        with self._write_lock:
+            row = self._pending_analyses.get(key)
+        if row:
+            response = row[5]
+        else:
+            result = self._get_connection().execute("""
                 SELECT response, timestamp 
                 FROM analysis_cache 
-                WHERE file_path = ? AND question_hash = ? AND model_name = ?
-            """, (file_path, question_hash, model_name))
+                WHERE content_hash = ? AND question_hash = ? AND model_name = ? AND prompt_version = ?
+                  AND timestamp >= ?
+            """, key + (self._expiry_cutoff(),)).fetchone()
+            response = result[0] if result else None
+
+        if not count:
+            return response
+        with self._write_lock:
+            if response is not None:
+                self._counters['hits'] += 1
+                self._touched_analyses[key] = time.time()
+            else:
+                self._counters['misses'] += 1
+        return response
+
+    def cache_summary(self, file_path: str, content_hash: str, summary: str,
+                      model_name: str, prompt_version: int = 1, context_hash: str = ""):
+        """
+        Cache a file summary; it does not depend on any question, so every
+        question can reuse it. context_hash covers the import context the
+        summary was made with.
+        """
+        key = (self._with_context(content_hash, context_hash), model_name, prompt_version)
+        row = key + (
+            file_path,
+            summary,
+            datetime.now().isoformat(),
+            len(file_path) + len(summary),
+            time.time()
+        )
+        with self._write_lock:
+            self._pending_summaries[key] = row
+            self._maybe_flush()
+
+    def get_cached_summary(self, content_hash: str, model_name: str,
+                           prompt_version: int = 1, context_hash: str = "") -> Optional[str]:
+        key = (self._with_context(content_hash, context_hash), model_name, prompt_version)
+
+        with self._write_lock:
+            row = self._pending_summaries.get(key)
+        if row:
+            summary = row[4]
+        else:
+            result = self._get_connection().execute("""
+                SELECT summary FROM summary_cache
+                WHERE content_hash = ? AND model_name = ? AND prompt_version = ? AND timestamp >= ?
+            """, key + (self._expiry_cutoff(),)).fetchone()
+            summary = result[0] if result else None
+
+        if summary is not None:
+            with self._write_lock:
+                self._touched_summaries[key] = time.time()
+        return summary
+
+    def _maybe_flush(self):
+        pending = (len(self._pending_files) + len(self._pending_analyses) + len(self._pending_summaries) +
+                   len(self._touched_files) + len(self._touched_analyses) + len(self._touched_summaries))
+        if pending >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Commit all buffered writes in a single transaction, then evict if needed"""
+        with self._write_lock:
+            has_writes = bool(self._pending_files or self._pending_analyses or self._pending_summaries)
+            touched = self._touched_files or self._touched_analyses or self._touched_summaries
+            if has_writes or touched or any(self._counters.values()):
+                conn = self._get_connection()
+                with conn:
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO file_cache 
+                        (path, content_hash, last_modified, size, file_type, 
+                         compressed_content, metadata, last_analyzed, byte_size, last_accessed,
+                         mtime_ns, st_size, inode)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, list(self._pending_files.values()))
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO analysis_cache 
+                        (content_hash, question_hash, model_name, prompt_version,
+                         file_path, response, timestamp, byte_size, last_accessed)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, list(self._pending_analyses.values()))
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO summary_cache
+                        (content_hash, model_name, prompt_version,
+                         file_path, summary, timestamp, byte_size, last_accessed)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, list(self._pending_summaries.values()))
+                    conn.executemany(
+                        "UPDATE file_cache SET last_accessed = ? WHERE path = ?",
+                        [(ts, path) for path, ts in self._touched_files.items()]
+                    )
+                    conn.executemany("""
+                        UPDATE analysis_cache SET last_accessed = ?
+                        WHERE content_hash = ? AND question_hash = ? AND model_name = ? AND prompt_version = ?
+                    """, [(ts,) + key for key, ts in self._touched_analyses.items()])
+                    conn.executemany("""
+                        UPDATE summary_cache SET last_accessed = ?
+                        WHERE content_hash = ? AND model_name = ? AND prompt_version = ?
+                    """, [(ts,) + key for key, ts in self._touched_summaries.items()])
+                    conn.executemany(
+                        "UPDATE cache_stats SET value = value + ? WHERE key = ?",
+                        [(count, key) for key, count in self._counters.items()]
+                    )
+                self._pending_files.clear()
+                self._pending_analyses.clear()
+                self._pending_summaries.clear()
+                self._touched_files.clear()
+                self._touched_analyses.clear()
+                self._touched_summaries.clear()
+                self._counters = {'hits': 0, 'misses': 0}
+
+                if has_writes:
+                    self.evict()
+            self._last_flush = time.monotonic()
+
+    def evict(self):
+        """
+        Delete expired entries, then least recently used ones until the cache
+        tables fit in max_size_bytes. Each step is a bounded, index-ordered query, so
+        a flush never scans the whole table.
+        """
+        with self._write_lock:
+            conn = self._get_connection()
+            cutoff = self._expiry_cutoff()
+
+            with conn:
+                expired = conn.execute("""
+                    DELETE FROM analysis_cache WHERE rowid IN (
+                        SELECT rowid FROM analysis_cache WHERE timestamp < ? LIMIT ?
+                    )
+                """, (cutoff, self.EVICTION_BATCH)).rowcount
+                expired += conn.execute("""
+                    DELETE FROM file_cache WHERE rowid IN (
+                        SELECT rowid FROM file_cache WHERE last_analyzed < ? LIMIT ?
+                    )
+                """, (cutoff, self.EVICTION_BATCH)).rowcount
+                expired += conn.execute("""
+                    DELETE FROM summary_cache WHERE rowid IN (
+                        SELECT rowid FROM summary_cache WHERE timestamp < ? LIMIT ?
+                    )
+                """, (cutoff, self.EVICTION_BATCH)).rowcount
+                if expired:
+                    conn.execute("UPDATE cache_stats SET value = value + ? WHERE key = 'expired'", (expired,))
+
+            while self._stored_bytes(conn) > self.max_size_bytes:
+                # Oldest rows of each table, merged so the globally least recent go first
+                candidates = [
+                    (accessed, table, rowid, byte_size)
+                    for table in CACHE_TABLES
+                    for rowid, accessed, byte_size in conn.execute(
+                        f"SELECT rowid, last_accessed, byte_size FROM {table} ORDER BY last_accessed LIMIT ?",
+                        (self.EVICTION_BATCH,)
+                    )
+                ]
+                if not candidates:
+                    break
+
+                candidates.sort(key=lambda c: c[0] or 0)
+                # Only as many as it takes to get back under budget
+                excess = self._stored_bytes(conn) - self.max_size_bytes
+                evicted = 0
+                with conn:
+                    for _, table, rowid, byte_size in candidates[:self.EVICTION_BATCH]:
+                        conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+                        evicted += 1
+                        excess -= byte_size or 0
+                        if excess <= 0:
+                            break
+                    conn.execute(
+                        "UPDATE cache_stats SET value = value + ? WHERE key = 'evictions'", (evicted,)
+                    )
+
+    def _stored_bytes(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM cache_stats WHERE key = 'bytes'").fetchone()[0]
+
+    def get_stats(self) -> Dict:
+        """Hit rate, stored bytes, eviction counts and entry counts for the cache"""
+        self.flush()
+        conn = self._get_connection()
+        stats = dict(conn.execute("SELECT key, value FROM cache_stats").fetchall())
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        stats['hit_rate'] = stats.get('hits', 0) / lookups if lookups else 0.0
+        stats['file_entries'] = conn.execute("SELECT COUNT(*) FROM file_cache").fetchone()[0]
+        stats['analysis_entries'] = conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        stats['summary_entries'] = conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+        stats['max_bytes'] = self.max_size_bytes
+        return stats
 
-            result = cursor.fetchone()
-            if result:
-                return result[0]
-        return None
\ No newline at end of file
+    def close(self):
+        """Flush pending writes and close every thread's connection"""
+        self.flush()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
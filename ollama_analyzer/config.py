@@ -62,11 +62,39 @@ class AnalyzerConfig:
     IGNORE_FILES: Set[str] = field(default_factory=default_ignore_files)
     CACHE_DIR: Path = field(default_factory=lambda: Path(".cache"))
     CACHE_EXPIRY_HOURS: int = 24
+    # File contents, answers and summaries; the project's search, dependency and embedding indexes are extra
     MAX_CACHE_SIZE_MB: int = 1024
+    CACHE_FLUSH_ROWS: int = 100
+    CACHE_FLUSH_INTERVAL_MS: int = 500
     MAX_FILE_SIZE_MB: int = 10
     BATCH_SIZE: int = 10
     PARALLEL_PROCESSES: int = 4
     DEFAULT_MODEL: str = "llama3.2"
+    # Per-file analysis only sends the top-K pre-filtered files to the model (0 = all)
+    RELEVANCE_TOP_K: int = 40
+    RELEVANCE_PATH_WEIGHT: int = 3
+    RELEVANCE_NEIGHBOR_WEIGHT: float = 0.5
+    # Ollama embedding model (e.g. "nomic-embed-text") for semantic file ranking; empty disables it
+    EMBEDDING_MODEL: str = ""
+    EMBEDDING_CHUNK_CHARS: int = 1500
+    # Reuse cached answers of an earlier question at least this similar (cosine, needs EMBEDDING_MODEL; 0 = exact only)
+    QUESTION_SIMILARITY_THRESHOLD: float = 0.0
+    # Bump when the per-file prompt changes so cached answers are not reused
+    PROMPT_VERSION: int = 3
+    # Token budget for the exported signatures of a file's imports in its prompt (0 = none)
+    DEPENDENCY_CONTEXT_TOKENS: int = 1024
+    # Question-independent per-file summaries, made leaves first and shown to importing files
+    FILE_SUMMARIES: bool = True
+    SUMMARY_MAX_TOKENS: int = 200
+    # Screen candidates against cached summaries and read only the files they flag in full
+    SUMMARY_SCREENING: bool = True
+    # Bump when the summary prompt changes so cached summaries are not reused
+    SUMMARY_PROMPT_VERSION: int = 1
+    # Prompt budget for whole-project queries; also sent to Ollama as num_ctx
+    CONTEXT_WINDOW_TOKENS: int = 8192
+    RESPONSE_RESERVE_TOKENS: int = 1024
+    CHARS_PER_TOKEN: float = 3.5
     API_TIMEOUT: int = 30
+    MAX_CONNECTIONS: int = 10
     MAX_RETRIES: int = 3
     RETRY_DELAY: int = 1
\ No newline at end of file
@@ -0,0 +1,202 @@
+import logging
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from config import AnalyzerConfig
+from cache_manager import CacheManager
+
+logger = logging.getLogger('ContextBuilder')
+
+_EXPORT_RE = re.compile(
+    r'^export\s+(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?'
+    r'(?P<kind>function\*?|class|interface|type|enum|const|let|var)?',
+    re.MULTILINE
+)
+_EXPORT_LIST_RE = re.compile(r'export\s*(?:type\s*)?\{[^}]*\}(?:\s*from\s*[\'"][^\'"\n]*[\'"])?')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_SIGNATURE_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.mts', '.cts')
+
+# Type declarations are shown whole up to this many lines, since their body is the signature
+MAX_TYPE_LINES = 12
+
+def _type_declaration(content: str, start: int) -> str:
+    """An exported interface/type/enum, cut after MAX_TYPE_LINES lines"""
+    depth = 0
+    pos = start
+    while pos < len(content):
+        char = content[pos]
+        if char in '{([':
+            depth += 1
+        elif char in '})]':
+            depth -= 1
+            if depth == 0 and char == '}':
+                pos += 1
+                break
+        elif depth == 0:
+            if char == ';':
+                break
+            # 'type A =' and union members may continue on the next line
+            if (char == '\n' and not content[start:pos].rstrip().endswith(('=', '|', '&'))
+                    and not content[pos:].lstrip().startswith(('|', '&'))):
+                break
+        pos += 1
+
+    lines = content[start:pos].rstrip().splitlines()
+    if len(lines) > MAX_TYPE_LINES:
+        lines = lines[:MAX_TYPE_LINES - 1] + ['  ...', '}']
+    return '\n'.join(lines)
+
+def _declaration_head(content: str, start: int) -> str:
+    """
+    An exported function, class or variable up to where its body starts:
+    parameters and return type for functions, the heritage clause for
+    classes, the type annotation and '=>' for arrow functions
+    """
+    depth = 0
+    pos = start
+    while pos < len(content):
+        char = content[pos]
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth == 0:
+            if char in '{;\n':
+                break
+            if content.startswith('=>', pos):
+                pos += 2
+                break
+        pos += 1
+    return _WHITESPACE_RE.sub(' ', content[start:pos]).strip().rstrip('=').rstrip()
+
+def extract_signatures(file_path: str, content: str) -> str:
+    """
+    The exported API of a script file without implementation bodies: one
+    line per exported function, class, variable or re-export, and exported
+    interfaces/types in full (up to MAX_TYPE_LINES lines). Non-script files
+    have no signatures.
+    """
+    if not file_path.lower().endswith(_SIGNATURE_EXTENSIONS):
+        return ''
+
+    signatures = []
+    for match in _EXPORT_RE.finditer(content):
+        export_list = _EXPORT_LIST_RE.match(content, match.start())
+        if export_list:
+            signatures.append(_WHITESPACE_RE.sub(' ', export_list.group()))
+        elif match.group('kind') in ('interface', 'type', 'enum'):
+            signatures.append(_type_declaration(content, match.start()))
+        else:
+            signatures.append(_declaration_head(content, match.start()))
+    return '\n'.join(dict.fromkeys(signature for signature in signatures if signature))
+
+class ContextBuilder:
+    """
+    Builds the dependency context sent alongside a file: for each file it
+    imports, that file's summary when one exists (see FileSummarizer) or else
+    its exported signatures, packed into a token budget. Each
+    neighbour's signatures are extracted once per builder, and a batch of
+    target files gets every shared neighbour only once, with neighbours that
+    are themselves targets left out since their full source is already sent.
+    Caches key the context on context_hash rather than on the built text.
+    """
+
+    def __init__(self, project_path: Path, config: AnalyzerConfig, dependency_analyzer):
+        self.project_path = project_path
+        self.config = config
+        self.dependency_analyzer = dependency_analyzer
+        self._signatures: Dict[str, str] = {}
+        # Filled by FileSummarizer; summary_lookup finds cached summaries of other files
+        self.summaries: Dict[str, str] = {}
+        self.summary_lookup: Optional[Callable[[str], Optional[str]]] = None
+        self._looked_up: Set[str] = set()
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.config.CHARS_PER_TOKEN)
+
+    def signatures(self, file_path: str) -> str:
+        """Exported signatures of a project file, read from disk on first use"""
+        if file_path not in self._signatures:
+            try:
+                with open(self.project_path / file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                self._signatures[file_path] = extract_signatures(file_path, content)
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Could not read {file_path} for context: {e}")
+                self._signatures[file_path] = ''
+        return self._signatures[file_path]
+
+    def summary(self, file_path: str) -> Optional[str]:
+        """A file's summary from this run, or from the cache on first use"""
+        if file_path not in self.summaries and self.summary_lookup and file_path not in self._looked_up:
+            self._looked_up.add(file_path)
+            self.summary_lookup(file_path)
+        return self.summaries.get(file_path)
+
+    def context_hash(self, file_path: str) -> str:
+        """
+        Cache key for the context of one file: the path and exported signatures
+        of each file it imports, one hop only. Summaries are left out since the
+        model words them differently every time, and a regenerated summary must
+        not invalidate every file importing it. Empty without imports.
+        """
+        graph = self.dependency_analyzer.graph
+        if file_path not in graph:
+            return ''
+        neighbours = sorted(neighbour for neighbour in graph.successors(file_path) if neighbour != file_path)
+        if not neighbours:
+            return ''
+        return CacheManager.hash_content(
+            '\n'.join(f"--- {neighbour} ---\n{self.signatures(neighbour)}" for neighbour in neighbours)
+        )
+
+    def build(self, file_paths: Iterable[str], budget_tokens: Optional[int] = None) -> str:
+        """
+        Import context for one or more target files. Imports shared by more
+        targets come first; a neighbour that does not fit whole is cut at a
+        line boundary, and the rest are listed by path only.
+        """
+        budget = self.config.DEPENDENCY_CONTEXT_TOKENS if budget_tokens is None else budget_tokens
+        targets = list(dict.fromkeys(file_paths))
+        graph = self.dependency_analyzer.graph
+        if budget <= 0:
+            return ''
+
+        # Most shared first; ties keep graph order
+        shared = Counter()
+        for file_path in targets:
+            if file_path in graph:
+                shared.update(neighbour for neighbour in graph.successors(file_path) if neighbour not in targets)
+        neighbours = sorted(shared, key=lambda neighbour: -shared[neighbour])
+
+        sections, omitted = [], []
+        remaining = budget
+        for neighbour in neighbours:
+            summary = self.summary(neighbour)
+            text = summary or self.signatures(neighbour)
+            if not text:
+                continue
+            header = f"--- {neighbour} (summary) ---" if summary else f"--- {neighbour} ---"
+            lines = []
+            cost = self.estimate_tokens(header)
+            for line in text.splitlines():
+                line_cost = self.estimate_tokens(line + '\n')
+                if cost + line_cost > remaining:
+                    break
+                lines.append(line)
+                cost += line_cost
+            if not lines:
+                omitted.append(neighbour)
+                continue
+            if len(lines) < len(text.splitlines()):
+                lines.append('...')
+            sections.append(header + '\n' + '\n'.join(lines))
+            remaining -= cost
+
+        if omitted:
+            sections.append("Also imported (not shown): " + ', '.join(omitted))
+        return '\n\n'.join(sections)
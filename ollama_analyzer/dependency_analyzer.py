@@ -1,11 +1,81 @@
+import json
+import logging
+import multiprocessing
 import os
 import re
-from typing import List, Set, Dict
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
-import networkx as nx
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
+from dependency_graph import DependencyGraph
+from import_resolver import ImportResolver
 
+logger = logging.getLogger('DependencyAnalyzer')
+
+# Strings right after from / import / import( / require( are module specifiers
+# and survive masking; one whitespace character between them is allowed
+_SPECIFIER_GUARD = (
+    r"(?<!from{q})(?<!from\s{q})(?<!import{q})(?<!import\s{q})"
+    r"(?<!import\({q})(?<!import\(\s{q})(?<!require\({q})(?<!require\(\s{q})"
+)
+# A '/' opens a regex literal after an operator or opening bracket (optionally
+# one space later), after 'return ' or at the start of a line; anywhere else
+# it is a division or part of a JSX tag
+_REGEX_GUARD = (
+    r"(?:(?<=[(,=:\[!&|?{};+\-*%~^]/)|(?<=[(,=:\[!&|?{};+\-*%~^]\s/)|(?<=return\s/)|(?<=\n/))"
+)
+
+# Comments, strings, template literals and regex literals. Every alternative
+# starts with a literal character so re can skip ordinary code quickly, and
+# the loops are unrolled so unterminated literals cannot backtrack
+_LITERAL_RE = re.compile(
+    r"'" + _SPECIFIER_GUARD.format(q="'") + r"[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+    r'|"' + _SPECIFIER_GUARD.format(q='"') + r'[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    r'|`[^`\\]*(?:\\.[^`\\]*)*`'
+    r'|/(?:'
+    r'/(?<!://)[^\n]*'
+    r'|\*[^*]*\*+(?:[^/*][^*]*\*+)*/'
+    r'|\*.*'
+    r'|' + _REGEX_GUARD + r'(?![*/])[^/\\\n\[]*(?:(?:\\.|\[[^\]\\\n]*(?:\\.[^\]\\\n]*)*\])[^/\\\n\[]*)*/'
+    r')',
+    re.DOTALL
+)
+
+# Run over the masked code. Each starts with a literal for the same reason; the
+# lookbehind after it rejects longer identifiers and member accesses, except
+# for hooks, where React.useMemo is still a hook (but a path like './useAuth' is not)
+_SPECIFIER = r'[\'"]([^\'"\n]+)[\'"]'
+_FROM_RE = re.compile(r'from(?<![\w$.]from)\s*' + _SPECIFIER)
+_IMPORT_RE = re.compile(r'import(?<![\w$.]import)\s*(?:\(\s*)?' + _SPECIFIER)
+_REQUIRE_RE = re.compile(r'require(?<![\w$.]require)\s*\(\s*' + _SPECIFIER)
+_EXPORT_RE = re.compile(r'export(?<![\w$.]export)(?![\w$])')
+_FUNCTION_COMPONENT_RE = re.compile(r'function(?<![\w$.]function)\s+([A-Z][\w$]*)')
+_CONST_COMPONENT_RE = re.compile(r'const(?<![\w$.]const)\s+([A-Z][\w$]*)')
+_HOOK_RE = re.compile(r'use(?<![\w$/]use)[A-Z][\w$]*')
+
+_REEXPORT_RE = re.compile(
+    r'export\s+(?:type\s+)?(?:\*\s*(?:as\s+(?P<star_name>[\w$]+)\s*)?|\{(?P<names>[^}]*)\}\s*)from'
+)
+_EXPORT_LIST_RE = re.compile(r'export\s*(?:type\s*)?\{(?P<names>[^}]*)\}')
+_EXPORT_DECL_RE = re.compile(
+    r'export\s+(?:default\s+)?(?:async\s+)?'
+    r'(?:function\*?|const|let|var|class|interface|type|enum)\s*(?P<name>[A-Za-z_$][\w$]*)'
+)
+_STYLE_IMPORT_RE = re.compile(r'@(?:import|use|forward)\s+(?:url\(\s*)?[\'"]([^\'"]+)[\'"]')
+
+_SCRIPT_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.mdx')
+_STYLE_EXTENSIONS = ('.css', '.scss', '.sass', '.less')
+
+def _export_list_names(names: str) -> List[str]:
+    """Exported names from the body of 'export { a, b as c }' (the alias is what is exported)"""
+    result = []
+    for item in names.split(','):
+        parts = item.split()
+        if parts:
+            result.append(parts[-1])
+    return result
 
 @dataclass
 class DependencyInfo:
@@ -15,75 +85,301 @@ class DependencyInfo:
     hooks: List[str]
     styles: List[str]
 
+def mask_literals(content: str) -> str:
+    """
+    Script source with comments, template and regex literals and every string
+    other than a module specifier replaced by a space, so nothing inside them
+    is mistaken for code
+    """
+    return _LITERAL_RE.sub(' ', content)
+
+def extract_dependencies(file_path: str, content: str) -> DependencyInfo:
+    """
+    Extract imports (static, multiline, side-effect, dynamic, require and
+    re-exports), exports, components, hooks and style imports. Literals are
+    masked in one pass and each kind is then found with its own pattern over
+    the masked code. Stylesheets only contribute their @import/@use targets
+    and other files (JSON, Markdown, SVG) nothing. Lists keep first-seen
+    order without duplicates.
+    """
+    lowered_path = file_path.lower()
+    if lowered_path.endswith(_STYLE_EXTENSIONS):
+        styles = list(dict.fromkeys(_STYLE_IMPORT_RE.findall(content)))
+        return DependencyInfo(imports=styles, exports=[], components=[], hooks=[], styles=styles)
+    if not lowered_path.endswith(_SCRIPT_EXTENSIONS):
+        return DependencyInfo(imports=[], exports=[], components=[], hooks=[], styles=[])
+
+    code = mask_literals(content)
+
+    # 'from' covers static imports and re-exports, 'import' side-effect and dynamic imports
+    specifiers = [(match.start(), match.group(1)) for match in _FROM_RE.finditer(code)]
+    specifiers += [(match.start(), match.group(1)) for match in _IMPORT_RE.finditer(code)]
+    if 'require' in code:
+        specifiers += [(match.start(), match.group(1)) for match in _REQUIRE_RE.finditer(code)]
+    specifiers.sort()
+    imports = list(dict.fromkeys(spec for _, spec in specifiers))
+
+    exports = {}
+    for match in _EXPORT_RE.finditer(code):
+        start = match.start()
+        statement = _REEXPORT_RE.match(code, start) or _EXPORT_LIST_RE.match(code, start)
+        if statement:
+            if statement.groupdict().get('star_name'):
+                exports[statement.group('star_name')] = None
+            for name in _export_list_names(statement.group('names') or ''):
+                exports[name] = None
+        else:
+            statement = _EXPORT_DECL_RE.match(code, start)
+            if statement:
+                exports[statement.group('name')] = None
+
+    components = _FUNCTION_COMPONENT_RE.findall(code) + _CONST_COMPONENT_RE.findall(code)
+
+    return DependencyInfo(
+        imports=imports,
+        exports=list(exports),
+        components=list(dict.fromkeys(components)),
+        hooks=list(dict.fromkeys(_HOOK_RE.findall(code))),
+        styles=[spec for spec in imports if spec.lower().endswith(_STYLE_EXTENSIONS)]
+    )
+
+def _extension(file_path: str) -> str:
+    """The part of a path extract_dependencies looks at, so cached records are keyed by it too"""
+    return os.path.splitext(file_path)[1].lower()
+
+def _extract_chunk(items: List[Tuple[str, str]]) -> List[Tuple[str, DependencyInfo]]:
+    """Process pool task: extract dependencies for a batch of (path, content) pairs"""
+    return [(file_path, extract_dependencies(file_path, content)) for file_path, content in items]
+
 class DependencyAnalyzer:
-    def __init__(self, project_root: Path):
+    """
+    Builds the project's import graph. build_dependency_graph parses every
+    file it is given; sync_dependency_graph keeps DependencyInfo records and
+    resolved edges in cache.db (under cache_dir) keyed by content hash, so
+    only new or edited files are parsed and their edges applied as a diff.
+    """
+
+    # Bump when extract_dependencies changes what it returns
+    PARSER_VERSION = 2
+
+    # Below this many files a process pool costs more to start than it saves
+    PARALLEL_THRESHOLD = 500
+    # Files per pool task, so IPC is paid per batch rather than per file
+    CHUNK_SIZE = 200
+
+    def __init__(self, project_root: Path, max_workers: Optional[int] = None,
+                 cache_dir: Optional[Path] = None):
         self.project_root = project_root
-        self.graph = nx.DiGraph()
+        self.max_workers = max(1, max_workers or 1)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.graph = DependencyGraph()
+        self.resolver = ImportResolver(project_root, [])
 
     def analyze_file(self, file_path: str, content: str) -> DependencyInfo:
-        # Basic patterns for detection
-        import_pattern = r'import\s+.+\s+from\s+[\'"]([^\'"]+)[\'"]'
-        export_pattern = r'export\s+(?:default\s+)?(?:function|const|class)\s+([A-Za-z0-9_]+)'
-        component_pattern = r'(?:function|const)\s+([A-Z][A-Za-z0-9_]*)'
-        hook_pattern = r'use[A-Z][A-Za-z0-9_]*'
-        style_pattern = r'import\s+[\'"](.+\.(?:css|scss|sass))[\'"]'
-
-        imports = re.findall(import_pattern, content)
-        exports = re.findall(export_pattern, content)
-        components = re.findall(component_pattern, content)
-        hooks = re.findall(hook_pattern, content)
-        styles = re.findall(style_pattern, content)
-
-        return DependencyInfo(
-            imports=imports,
-            exports=exports,
-            components=components,
-            hooks=hooks,
-            styles=styles
-        )
-
-    def build_dependency_graph(self, files: Dict[str, str]):
-        self.graph.clear()
-
-        for file_path, content in files.items():
-            self.graph.add_node(file_path)
-            dep_info = self.analyze_file(file_path, content)
-
-            # Add dependencies
-            for imp in dep_info.imports:
-                if imp.startswith('.'):
-                    # Resolve relative import
-                    resolved = self.resolve_import(file_path, imp)
-                    if resolved in files:
-                        self.graph.add_edge(file_path, resolved)
+        return extract_dependencies(file_path, content)
+
+    def analyze_files(self, files: Dict[str, str]) -> Iterator[Tuple[str, DependencyInfo]]:
+        """
+        Yield (path, DependencyInfo) for every file. Large file sets are split
+        into chunks and parsed on a pool of max_workers processes.
+        """
+        if self.max_workers == 1 or len(files) < self.PARALLEL_THRESHOLD:
+            for file_path, content in files.items():
+                yield file_path, extract_dependencies(file_path, content)
+            return
 
+        items = list(files.items())
+        chunk_size = max(1, min(self.CHUNK_SIZE, len(items) // (self.max_workers * 4)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        # Spawned rather than forked: the GUI calls this with Tk and worker threads running
+        with ProcessPoolExecutor(max_workers=self.max_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            for results in executor.map(_extract_chunk, chunks):
+                yield from results
+
+    def _resolve_edges(self, file_path: str, imports: Iterable[str]) -> List[str]:
+        """Project files an importing file depends on, including tsconfig/jsconfig aliases such as '@/components'"""
+        targets = {}
+        for imp in imports:
+            resolved = self.resolver.resolve(file_path, imp)
+            if resolved is not None and resolved != file_path:
+                targets[resolved] = None
+        return list(targets)
+
+    def build_dependency_graph(self, files: Dict[str, str]) -> DependencyGraph:
+        # Resolution is checked against the files being graphed, never the disk
+        self.resolver = ImportResolver(self.project_root, files.keys())
+
+        edges = []
+        for file_path, dep_info in self.analyze_files(files):
+            edges.extend((file_path, target) for target in self._resolve_edges(file_path, dep_info.imports))
+
+        self.graph = DependencyGraph(files, edges)
         return self.graph
 
+    def _open_store(self) -> sqlite3.Connection:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.cache_dir / "cache.db", timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dependency_info (
+                    content_hash TEXT,
+                    extension TEXT,
+                    info TEXT,
+                    PRIMARY KEY (content_hash, extension)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dependency_files (
+                    file_path TEXT PRIMARY KEY,
+                    content_hash TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dependency_edges (
+                    source TEXT,
+                    target TEXT,
+                    PRIMARY KEY (source, target)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dependency_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+            row = conn.execute("SELECT value FROM dependency_meta WHERE key = 'parser_version'").fetchone()
+            if row is None or int(row[0]) != self.PARSER_VERSION:
+                # Records from another parser version cannot be trusted
+                for table in ('dependency_info', 'dependency_files', 'dependency_edges'):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute(
+                    "INSERT OR REPLACE INTO dependency_meta (key, value) VALUES ('parser_version', ?)",
+                    (str(self.PARSER_VERSION),)
+                )
+        return conn
+
+    def sync_dependency_graph(self, content_hashes: Dict[str, str],
+                              read_content: Callable[[str], Optional[str]]) -> DependencyGraph:
+        """
+        Bring the persisted graph in line with the scanner's file list
+        (path -> content hash) and return it. Only files whose hash changed are
+        read, through read_content, and parsed, unless cache.db already holds
+        DependencyInfo for that content. Their outgoing edges are diffed against
+        the stored ones. When files are added or removed, or the tsconfig
+        aliases change, the stored imports of every file are re-resolved
+        without parsing, since an import may now point somewhere else.
+        """
+        if self.cache_dir is None:
+            raise ValueError("sync_dependency_graph needs a cache_dir")
+
+        self.resolver = ImportResolver(self.project_root, content_hashes.keys())
+        resolver_key = json.dumps([self.resolver.base_url, self.resolver.paths])
+
+        conn = self._open_store()
+        try:
+            stored = dict(conn.execute("SELECT file_path, content_hash FROM dependency_files"))
+            changed = [path for path, content_hash in content_hashes.items() if stored.get(path) != content_hash]
+            removed = [path for path in stored if path not in content_hashes]
+            row = conn.execute("SELECT value FROM dependency_meta WHERE key = 'resolver'").fetchone()
+            file_set_changed = (bool(removed) or any(path not in stored for path in changed)
+                                or row is None or row[0] != resolver_key)
+
+            # DependencyInfo for changed content: stored records first, then parse the rest
+            infos: Dict[str, DependencyInfo] = {}
+            to_parse = {}
+            for file_path in changed:
+                row = conn.execute(
+                    "SELECT info FROM dependency_info WHERE content_hash = ? AND extension = ?",
+                    (content_hashes[file_path], _extension(file_path))
+                ).fetchone()
+                if row:
+                    infos[file_path] = DependencyInfo(**json.loads(row[0]))
+                    continue
+                # Unreadable files keep their old record and are retried next sync
+                content = read_content(file_path)
+                if content is not None:
+                    to_parse[file_path] = content
+            parsed = dict(self.analyze_files(to_parse))
+            infos.update(parsed)
+
+            # Every file's imports are needed when resolution may have changed
+            sources = dict(infos)
+            if file_set_changed:
+                for file_path, extension, info in conn.execute("""
+                    SELECT f.file_path, i.extension, i.info FROM dependency_files f
+                    JOIN dependency_info i ON i.content_hash = f.content_hash
+                """):
+                    if (file_path in content_hashes and file_path not in sources
+                            and extension == _extension(file_path)):
+                        sources[file_path] = DependencyInfo(**json.loads(info))
+
+            targets: Dict[str, Set[str]] = {}
+            for source, target in conn.execute("SELECT source, target FROM dependency_edges"):
+                targets.setdefault(source, set()).add(target)
+            for file_path in removed:
+                targets.pop(file_path, None)
+
+            added_edges, removed_edges = [], []
+            for file_path, info in sources.items():
+                old_targets = targets.get(file_path, set())
+                new_targets = set(self._resolve_edges(file_path, info.imports))
+                added_edges.extend((file_path, target) for target in new_targets - old_targets)
+                removed_edges.extend((file_path, target) for target in old_targets - new_targets)
+                targets[file_path] = new_targets
+
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO dependency_info (content_hash, extension, info) VALUES (?, ?, ?)",
+                    [(content_hashes[path], _extension(path), json.dumps(asdict(info)))
+                     for path, info in parsed.items()]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO dependency_files (file_path, content_hash) VALUES (?, ?)",
+                    [(path, content_hashes[path]) for path in infos]
+                )
+                conn.executemany("DELETE FROM dependency_files WHERE file_path = ?", [(path,) for path in removed])
+                conn.executemany("DELETE FROM dependency_edges WHERE source = ?", [(path,) for path in removed])
+                conn.executemany("DELETE FROM dependency_edges WHERE source = ? AND target = ?", removed_edges)
+                conn.executemany("INSERT INTO dependency_edges (source, target) VALUES (?, ?)", added_edges)
+                conn.execute(
+                    "INSERT OR REPLACE INTO dependency_meta (key, value) VALUES ('resolver', ?)", (resolver_key,)
+                )
+                if changed or removed:
+                    # Keep records only for content some file still has
+                    conn.execute("""
+                        DELETE FROM dependency_info
+                        WHERE content_hash NOT IN (SELECT content_hash FROM dependency_files)
+                    """)
+
+            if changed or removed:
+                logger.info(
+                    f"Dependency graph: parsed {len(parsed)} of {len(content_hashes)} files, "
+                    f"{len(added_edges)} edges added, {len(removed_edges)} removed"
+                )
+            self.graph = DependencyGraph(
+                content_hashes,
+                ((source, target) for source, file_targets in targets.items() for target in file_targets)
+            )
+            return self.graph
+        finally:
+            conn.close()
+
     def resolve_import(self, source_file: str, import_path: str) -> str:
-        source_dir = os.path.dirname(source_file)
-        if import_path.startswith('.'):
-            resolved = os.path.normpath(os.path.join(source_dir, import_path))
-            # Add common extensions if none specified
-            if not os.path.splitext(resolved)[1]:
-                for ext in ['.js', '.jsx', '.ts', '.tsx']:
-                    if os.path.exists(self.project_root / f"{resolved}{ext}"):
-                        return f"{resolved}{ext}"
+        """Resolve against the last graphed file set; unresolved imports come back normalised"""
+        resolved = self.resolver.resolve(source_file, import_path)
+        if resolved is not None:
             return resolved
+        if import_path.startswith('.'):
+            return os.path.normpath(os.path.join(os.path.dirname(source_file), import_path))
         return import_path
 
     def get_related_files(self, file_path: str, depth: int = 2) -> Set[str]:
-        if file_path not in self.graph:
-            return set()
-
-        related = set()
-        current_level = {file_path}
-
-        for _ in range(depth):
-            next_level = set()
-            for current_file in current_level:
-                next_level.update(self.graph.predecessors(current_file))
-                next_level.update(self.graph.successors(current_file))
-            related.update(current_level)
-            current_level = next_level - related
+        return self.graph.related(file_path, depth)
 
-        return related
\ No newline at end of file
+    def get_dependents(self, file_paths: Iterable[str], depth: Optional[int] = None) -> Set[str]:
+        """Files that import any of file_paths, transitively unless depth limits the hops"""
+        return self.graph.reverse_dependencies(file_paths, depth)
@@ -0,0 +1,137 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+class DependencyGraph:
+    """
+    Compact directed import graph. File paths are interned to integer ids and
+    both directions are stored in CSR form: the imports of file i are
+    succ_targets[succ_offsets[i]:succ_offsets[i + 1]], and its importers are
+    the same slice of pred_targets/pred_offsets. The graph is immutable;
+    build a new one when the edges change.
+    """
+
+    def __init__(self, paths: Iterable[str] = (), edges: Iterable[Tuple[str, str]] = ()):
+        self.paths: List[str] = list(dict.fromkeys(paths))
+        self.ids: Dict[str, int] = {path: i for i, path in enumerate(self.paths)}
+
+        # Deduplicated (source, target) id pairs, ignoring edges to unknown files
+        node_count = len(self.paths)
+        encoded = set()
+        for source, target in edges:
+            source_id, target_id = self.ids.get(source), self.ids.get(target)
+            if source_id is not None and target_id is not None:
+                encoded.add(source_id * node_count + target_id)
+        pairs = sorted(encoded)
+
+        self.succ_offsets, self.succ_targets = self._build_csr(
+            node_count, [pair // node_count for pair in pairs], [pair % node_count for pair in pairs]
+        )
+        self.pred_offsets, self.pred_targets = self._build_csr(
+            node_count, [pair % node_count for pair in pairs], [pair // node_count for pair in pairs]
+        )
+
+    @staticmethod
+    def _build_csr(node_count: int, sources: List[int], targets: List[int]) -> Tuple[array, array]:
+        offsets = array('i', [0]) * (node_count + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        adjacency = array('i', [0]) * len(targets)
+        cursor = array('i', offsets)
+        for source, target in zip(sources, targets):
+            adjacency[cursor[source]] = target
+            cursor[source] += 1
+        return offsets, adjacency
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.ids
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def number_of_nodes(self) -> int:
+        return len(self.paths)
+
+    def number_of_edges(self) -> int:
+        return len(self.succ_targets)
+
+    def nodes(self) -> List[str]:
+        return list(self.paths)
+
+    def edges(self) -> Iterator[Tuple[str, str]]:
+        for source_id, path in enumerate(self.paths):
+            for target_id in self.succ_targets[self.succ_offsets[source_id]:self.succ_offsets[source_id + 1]]:
+                yield path, self.paths[target_id]
+
+    def successors(self, path: str) -> List[str]:
+        """Files that path imports"""
+        i = self.ids[path]
+        return [self.paths[j] for j in self.succ_targets[self.succ_offsets[i]:self.succ_offsets[i + 1]]]
+
+    def predecessors(self, path: str) -> List[str]:
+        """Files that import path"""
+        i = self.ids[path]
+        return [self.paths[j] for j in self.pred_targets[self.pred_offsets[i]:self.pred_offsets[i + 1]]]
+
+    def _bfs(self, start_ids: Iterable[int], depth: Optional[int],
+             use_successors: bool, use_predecessors: bool) -> Set[str]:
+        visited = bytearray(len(self.paths))
+        found = []
+        for i in start_ids:
+            if not visited[i]:
+                visited[i] = 1
+                found.append(i)
+
+        directions = []
+        if use_successors:
+            directions.append((self.succ_offsets, self.succ_targets))
+        if use_predecessors:
+            directions.append((self.pred_offsets, self.pred_targets))
+
+        # Level by level, so depth is just the number of expansions
+        frontier = found[:]
+        level = 0
+        while frontier and (depth is None or level < depth):
+            next_frontier = []
+            for i in frontier:
+                for offsets, targets in directions:
+                    for j in targets[offsets[i]:offsets[i + 1]]:
+                        if not visited[j]:
+                            visited[j] = 1
+                            next_frontier.append(j)
+            found.extend(next_frontier)
+            frontier = next_frontier
+            level += 1
+
+        paths = self.paths
+        return {paths[i] for i in found}
+
+    def related(self, path: str, depth: int = 2) -> Set[str]:
+        """
+        path plus every file within depth - 1 import hops in either direction
+        (the semantics of DependencyAnalyzer.get_related_files)
+        """
+        if path not in self.ids or depth <= 0:
+            return set()
+        return self._bfs([self.ids[path]], depth - 1, True, True)
+
+    def reverse_dependencies(self, paths: Iterable[str], depth: Optional[int] = None) -> Set[str]:
+        """
+        Every file that imports any of paths, directly or (up to depth hops)
+        transitively, in one multi-source traversal. The given files are
+        included only when they import one another.
+        """
+        start_ids = [self.ids[path] for path in paths if path in self.ids]
+        if not start_ids:
+            return set()
+
+        dependents = set()
+        for i in start_ids:
+            for j in self.pred_targets[self.pred_offsets[i]:self.pred_offsets[i + 1]]:
+                dependents.add(j)
+        if depth is not None and depth <= 1:
+            return {self.paths[j] for j in dependents}
+        next_depth = None if depth is None else depth - 1
+        return self._bfs(dependents, next_depth, False, True)
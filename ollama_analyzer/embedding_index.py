@@ -0,0 +1,402 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cache_manager import CacheManager
+from ollama_client import OllamaClient
+
+logger = logging.getLogger('EmbeddingIndex')
+
+# Top-level declarations start a new chunk; indented code stays with its parent
+_DECLARATION_RE = re.compile(
+    r'(?:export\s+(?:default\s+)?)?(?:async\s+)?'
+    r'(?:function\*?|class|const|let|var|interface|type|enum)\s+[A-Za-z_$]'
+)
+_LEADING_COMMENT_RE = re.compile(r'\s*(?:/\*\*|\*|//|@)')
+
+@dataclass
+class SourceChunk:
+    file_path: str
+    start_line: int
+    end_line: int
+    text: str
+
+def chunk_source(file_path: str, content: str, max_chars: int = 1500) -> List[SourceChunk]:
+    """
+    Split a file on function/component boundaries. Small neighbouring
+    declarations are merged up to max_chars; larger ones are split on lines.
+    Line numbers are 1-based and inclusive.
+    """
+    lines = content.splitlines(keepends=True)
+    if not lines:
+        return []
+
+    starts = [0]
+    for i in range(1, len(lines)):
+        if _DECLARATION_RE.match(lines[i]):
+            # Keep JSDoc comments and decorators with the declaration they describe
+            start = i
+            while start - 1 > starts[-1] and _LEADING_COMMENT_RE.match(lines[start - 1]):
+                start -= 1
+            starts.append(start)
+    starts.append(len(lines))
+
+    # (start, end) line ranges no longer than max_chars
+    ranges = []
+    for seg_start, seg_end in zip(starts, starts[1:]):
+        piece_start, piece_len = seg_start, 0
+        for i in range(seg_start, seg_end):
+            if piece_len and piece_len + len(lines[i]) > max_chars:
+                ranges.append((piece_start, i))
+                piece_start, piece_len = i, 0
+            piece_len += len(lines[i])
+        ranges.append((piece_start, seg_end))
+
+    chunks = []
+    chunk_start = chunk_end = ranges[0][0]
+    chunk_len = 0
+    for start, end in ranges:
+        size = sum(len(line) for line in lines[start:end])
+        if chunk_len and chunk_len + size > max_chars:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start, chunk_len = start, 0
+        chunk_end = end
+        chunk_len += size
+    chunks.append((chunk_start, chunk_end))
+
+    result = []
+    for start, end in chunks:
+        # A single minified line can still exceed max_chars; its head is representative enough
+        text = ''.join(lines[start:end])[:max_chars]
+        if text.strip():
+            result.append(SourceChunk(file_path, start + 1, end, text))
+    return result
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+def _index_lock(vectors_path: Path) -> threading.Lock:
+    """One lock per index file, shared by every EmbeddingIndex in the process"""
+    with _locks_lock:
+        return _locks.setdefault(str(vectors_path.resolve()), threading.Lock())
+
+class EmbeddingIndex:
+    """
+    Chunk embeddings for a project, stored next to cache.db.
+    Vectors are L2-normalised float32 rows in a raw file that is memory-mapped
+    for search, so cosine similarity is a single matrix-vector product, and
+    embedding_chunks maps each live row to its file and line range.
+
+    Chunks are keyed by a hash of their text and files by the content hash
+    CacheManager computes, so an update only chunks changed files and only
+    embeds chunks whose text is new. Rows of chunks that disappear become
+    tombstones (no longer referenced by embedding_chunks) and are dropped by
+    compact() once they make up COMPACT_RATIO of the matrix.
+    """
+
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, cache_dir: Path, client: OllamaClient, model_name: str,
+                 max_chars: int = 1500, workers: int = 4):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "cache.db"
+        self.vectors_path = self.cache_dir / "embeddings.f32"
+        self.client = client
+        self.model_name = model_name
+        self.max_chars = max_chars
+        self.workers = max(1, workers)
+        self._lock = _index_lock(self.vectors_path)
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_key = None
+
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_database()
+
+    def init_database(self):
+        with self.conn:
+            # The first index format stored a whole-project .npy matrix keyed by position
+            legacy_path = self.cache_dir / "embeddings.npy"
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(embedding_chunks)")]
+            if columns and 'chunk_hash' not in columns:
+                self.conn.execute("DROP TABLE embedding_chunks")
+                self.conn.execute("DELETE FROM embedding_files")
+                self.conn.execute("DELETE FROM embedding_meta")
+            if legacy_path.exists():
+                os.remove(legacy_path)
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_files (
+                    file_path TEXT PRIMARY KEY,
+                    content_hash TEXT
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_chunks (
+                    row_id INTEGER PRIMARY KEY,
+                    file_path TEXT,
+                    chunk_hash TEXT,
+                    start_line INTEGER,
+                    end_line INTEGER
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_file ON embedding_chunks(file_path)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM embedding_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO embedding_meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    @property
+    def total_rows(self) -> int:
+        return int(self._get_meta('rows') or 0)
+
+    @property
+    def dead_rows(self) -> int:
+        live = self.conn.execute("SELECT COUNT(*) FROM embedding_chunks").fetchone()[0]
+        return self.total_rows - live
+
+    def _load_matrix(self) -> Optional[np.ndarray]:
+        rows, dim = self.total_rows, int(self._get_meta('dim') or 0)
+        if not rows or not dim or not self.vectors_path.exists():
+            self._release_matrix()
+            return None
+
+        # Another index instance may have appended to or compacted the file since it was mapped
+        stat_result = self.vectors_path.stat()
+        key = (rows, stat_result.st_ino, stat_result.st_mtime_ns)
+        if self._matrix is None or self._matrix_key != key:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, dim))
+            self._matrix_key = key
+        return self._matrix
+
+    def _release_matrix(self):
+        # The mapping must be dropped before the file is replaced (required on Windows)
+        self._matrix = None
+        self._matrix_key = None
+
+    def _reset(self):
+        self._release_matrix()
+        self.conn.execute("DELETE FROM embedding_chunks")
+        self.conn.execute("DELETE FROM embedding_files")
+        self.conn.execute("DELETE FROM embedding_meta")
+        self._set_meta('model_name', self.model_name)
+        if self.vectors_path.exists():
+            os.remove(self.vectors_path)
+
+    def _embed_all(self, texts: List[str]) -> np.ndarray:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='embed') as executor:
+            vectors = list(executor.map(lambda text: self.client.embed(self.model_name, text), texts))
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def _append_vectors(self, matrix: np.ndarray) -> int:
+        """Write rows after the last committed row and return the first new row id"""
+        self._release_matrix()
+        first_row = self.total_rows
+        dim = int(self._get_meta('dim') or matrix.shape[1])
+        if matrix.shape[1] != dim:
+            raise ValueError(f"Embedding size changed from {dim} to {matrix.shape[1]}")
+
+        # Seek rather than append, so rows left by an interrupted update are overwritten
+        mode = 'r+b' if self.vectors_path.exists() else 'wb'
+        with open(self.vectors_path, mode) as f:
+            f.seek(first_row * dim * 4)
+            f.write(matrix.astype(np.float32).tobytes())
+            f.truncate()
+        self._set_meta('dim', dim)
+        return first_row
+
+    def update(self, contents: Dict[str, str], content_hashes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Bring the index in line with the given files (path -> content).
+        content_hashes should be the hashes CacheManager already has for the
+        files; unchanged files are skipped without being chunked. Returns the
+        number of chunks embedded.
+        """
+        if content_hashes is None:
+            content_hashes = {path: CacheManager.hash_content(content) for path, content in contents.items()}
+
+        with self._lock:
+            if self._get_meta('model_name') != self.model_name:
+                with self.conn:
+                    self._reset()
+
+            stored = dict(self.conn.execute("SELECT file_path, content_hash FROM embedding_files"))
+            changed = [path for path, content_hash in content_hashes.items() if stored.get(path) != content_hash]
+            removed = [path for path in stored if path not in content_hashes]
+            if not changed and not removed:
+                return 0
+
+            # Rows of the previous versions, reusable when a chunk's text is unchanged
+            previous: Dict[str, List[int]] = {}
+            for path in changed + removed:
+                for row_id, chunk_hash in self.conn.execute(
+                    "SELECT row_id, chunk_hash FROM embedding_chunks WHERE file_path = ?", (path,)
+                ):
+                    previous.setdefault(chunk_hash, []).append(row_id)
+
+            kept, new_chunks, texts = [], [], []
+            for path in changed:
+                for chunk in chunk_source(path, contents[path], self.max_chars):
+                    text = f"{path}\n{chunk.text}"
+                    chunk_hash = CacheManager.hash_content(text)
+                    rows = previous.get(chunk_hash)
+                    if rows:
+                        kept.append((rows.pop(), path, chunk_hash, chunk.start_line, chunk.end_line))
+                    else:
+                        new_chunks.append((path, chunk_hash, chunk.start_line, chunk.end_line))
+                        texts.append(text)
+
+            if texts:
+                logger.info(f"Embedding {len(texts)} new chunks from {len(changed)} changed files")
+                matrix = self._embed_all(texts)
+
+            with self.conn:
+                if texts:
+                    first_row = self._append_vectors(matrix)
+                    self._set_meta('rows', first_row + len(texts))
+                    kept.extend(
+                        (first_row + i, *chunk) for i, chunk in enumerate(new_chunks)
+                    )
+
+                # Rows that are no longer referenced are the tombstones compact() removes
+                self.conn.executemany(
+                    "DELETE FROM embedding_chunks WHERE file_path = ?", [(path,) for path in changed + removed]
+                )
+                self.conn.executemany(
+                    "INSERT INTO embedding_chunks (row_id, file_path, chunk_hash, start_line, end_line) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    kept
+                )
+                self.conn.executemany(
+                    "DELETE FROM embedding_files WHERE file_path = ?", [(path,) for path in removed]
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_files (file_path, content_hash) VALUES (?, ?)",
+                    [(path, content_hashes[path]) for path in changed]
+                )
+            return len(texts)
+
+    def needs_compaction(self) -> bool:
+        total = self.total_rows
+        return total > 0 and self.dead_rows > total * self.COMPACT_RATIO
+
+    def compact(self, force: bool = False) -> int:
+        """Rewrite the matrix without tombstoned rows; returns the number of rows dropped"""
+        with self._lock:
+            if not force and not self.needs_compaction():
+                return 0
+
+            matrix = self._load_matrix()
+            live = [row[0] for row in self.conn.execute("SELECT row_id FROM embedding_chunks ORDER BY row_id")]
+            dropped = self.total_rows - len(live)
+            tmp_path = self.vectors_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                if live:
+                    f.write(np.ascontiguousarray(matrix[live]).tobytes())
+            self._release_matrix()
+            del matrix
+
+            with self.conn:
+                # Ascending order never collides: each row moves to an id no larger than its own
+                self.conn.executemany(
+                    "UPDATE embedding_chunks SET row_id = ? WHERE row_id = ?",
+                    [(new_id, old_id) for new_id, old_id in enumerate(live) if new_id != old_id]
+                )
+                self._set_meta('rows', len(live))
+                os.replace(tmp_path, self.vectors_path)
+
+            logger.info(f"Compacted embedding index, dropped {dropped} rows")
+            return dropped
+
+    def compact_in_background(self) -> Optional[threading.Thread]:
+        """Start compaction on a separate connection if enough rows are tombstoned"""
+        if not self.needs_compaction():
+            return None
+
+        def run():
+            index = EmbeddingIndex(self.cache_dir, self.client, self.model_name, self.max_chars)
+            try:
+                index.compact()
+            except Exception as e:
+                logger.error(f"Error compacting embedding index: {str(e)}")
+            finally:
+                index.close()
+
+        thread = threading.Thread(target=run, name='embedding-compact', daemon=True)
+        thread.start()
+        return thread
+
+    def search(self, question: str, top_k: int = 10) -> List[Tuple[str, int, int, float]]:
+        """Return the top_k chunks as (file_path, start_line, end_line, cosine similarity)"""
+        query = np.asarray(self.client.embed(self.model_name, question), dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        with self._lock:
+            matrix = self._load_matrix()
+            if matrix is None or not len(matrix):
+                return []
+            scores = matrix @ (query / norm)
+
+            if self.dead_rows:
+                live = np.fromiter(
+                    (row[0] for row in self.conn.execute("SELECT row_id FROM embedding_chunks")), dtype=np.int64
+                )
+                masked = np.full_like(scores, -np.inf)
+                masked[live] = scores[live]
+                scores = masked
+                top_k = min(top_k, len(live))
+            if top_k <= 0:
+                return []
+
+            top_k = min(top_k, len(scores))
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-scores[top])]
+
+            rows = {
+                row_id: (file_path, start_line, end_line)
+                for row_id, file_path, start_line, end_line in self.conn.execute(
+                    f"SELECT row_id, file_path, start_line, end_line FROM embedding_chunks "
+                    f"WHERE row_id IN ({','.join('?' * len(top))})",
+                    [int(row) for row in top]
+                )
+            }
+        return [(*rows[int(row)], float(scores[row])) for row in top if int(row) in rows]
+
+    def file_scores(self, question: str, top_k: int = 10) -> Dict[str, float]:
+        """Best chunk similarity per file, for the files behind the top chunks"""
+        scores: Dict[str, float] = {}
+        # Several top chunks often come from the same file, so look a little deeper
+        for file_path, _, _, score in self.search(question, top_k * 4):
+            if score > scores.get(file_path, -1.0):
+                scores[file_path] = score
+        return dict(sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k])
+
+    def close(self):
+        self._release_matrix()
+        self.conn.close()
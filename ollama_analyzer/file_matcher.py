@@ -0,0 +1,47 @@
+import fnmatch
+import re
+from typing import Iterable, Optional
+
+class FileMatcher:
+    """
+    Precompiled filename matcher for SUPPORTED_EXTENSIONS and IGNORE_FILES.
+    Extensions are matched as suffixes, so compound entries such as
+    '.module.css' or '.d.ts' work, and ignore entries may be exact names,
+    bare extensions ('.png') or fnmatch globs ('*.test.tsx', 'jest.config.*').
+    Matching is case-insensitive.
+    """
+
+    def __init__(self, extensions: Iterable[str], ignore_patterns: Iterable[str]):
+        # Alternatives are tried at the leftmost possible start first, so the
+        # longest matching suffix wins ('.module.css' over '.css')
+        ext_alternatives = sorted((re.escape(ext) for ext in extensions), key=len, reverse=True)
+        self._extension_re = re.compile(
+            "(?:" + "|".join(ext_alternatives) + r")\Z", re.IGNORECASE
+        ) if ext_alternatives else None
+
+        ignore_alternatives = []
+        for pattern in ignore_patterns:
+            if any(ch in pattern for ch in "*?["):
+                ignore_alternatives.append(fnmatch.translate(pattern))
+            elif pattern.startswith('.'):
+                # '.png' means the extension; '.DS_Store' still matches exactly
+                ignore_alternatives.append(r"(?s:.*" + re.escape(pattern) + r")\Z")
+            else:
+                ignore_alternatives.append(r"(?:" + re.escape(pattern) + r")\Z")
+        self._ignore_re = re.compile(
+            "|".join(ignore_alternatives), re.IGNORECASE
+        ) if ignore_alternatives else None
+
+    @classmethod
+    def from_config(cls, config) -> 'FileMatcher':
+        return cls(config.SUPPORTED_EXTENSIONS, config.IGNORE_FILES)
+
+    def match_extension(self, filename: str) -> Optional[str]:
+        """Return the longest supported extension the filename ends with, lowercased"""
+        if self._extension_re is None:
+            return None
+        match = self._extension_re.search(filename)
+        return match.group(0).lower() if match else None
+
+    def is_ignored(self, filename: str) -> bool:
+        return self._ignore_re is not None and self._ignore_re.match(filename) is not None
@@ -0,0 +1,188 @@
+import logging
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import AnalyzerConfig
+from cache_manager import CacheManager
+
+logger = logging.getLogger('FileSummarizer')
+
+SUMMARY_SYSTEM_PROMPT = """You summarize single source files from a Next.js project.
+The summaries stand in for the source when other files that import it are analyzed,
+so describe what the file provides, not how to change it."""
+
+SUMMARY_INSTRUCTIONS = """Summarize this file in at most 6 short bullet points:
+- its role (page, layout, component, hook, API route, utility, config, styles...)
+- each export: what it does, its important parameters/props and what it returns or renders
+- state, data fetching, side effects and external services it uses
+Do not include code or suggestions."""
+
+SCREENING_SYSTEM_PROMPT = """You decide which files of a Next.js project must be read in full
+to answer a question, using a short summary of each file."""
+
+SCREENING_INSTRUCTIONS = """List the path of every file whose full source is needed to answer
+the question, one per line, copied exactly as shown. If none are needed, reply with exactly NONE."""
+
+# Bullets, numbering and quoting the model may put around a listed path
+_LIST_ITEM_RE = re.compile(r'^\s*(?:[-*\u2022]|\d+[.)])?\s*[`\'"]?(.*?)[`\'"]?\s*$')
+
+class FileSummarizer:
+    """
+    Short, question-independent summaries of project files, cached by content
+    hash, model and SUMMARY_PROMPT_VERSION. A file's prompt includes the
+    context of its imports (their summaries where already made), so
+    summarizing leaves first gives dependents the most to build on. The
+    exported signatures of those imports are part of the key (see
+    ContextBuilder.context_hash), so a changed API makes its direct importers'
+    summaries miss, while an edit inside a function body or a regenerated
+    summary does not ripple through the project. Every
+    summary made or loaded is registered with the ContextBuilder, which then
+    shows it to importing files in place of signatures.
+
+    Because summaries do not depend on the question, a new question can be
+    screened against them first (see screen) and only the files they flag
+    read in full.
+    """
+
+    def __init__(self, project_path: Path, config: AnalyzerConfig, cache: CacheManager,
+                 client, model_name: str, context_builder=None):
+        self.project_path = project_path
+        self.config = config
+        self.cache = cache
+        self.client = client
+        self.model_name = model_name
+        self.context_builder = context_builder
+        self.prompt_version = config.SUMMARY_PROMPT_VERSION
+        if context_builder is not None:
+            context_builder.summary_lookup = self.lookup
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.config.CHARS_PER_TOKEN)
+
+    def _register(self, file_path: str, summary: Optional[str]) -> Optional[str]:
+        if summary and self.context_builder is not None:
+            self.context_builder.summaries[file_path] = summary
+        return summary
+
+    def _context(self, file_path: str) -> str:
+        return self.context_builder.build([file_path]) if self.context_builder is not None else ''
+
+    def _context_hash(self, file_path: str) -> str:
+        return self.context_builder.context_hash(file_path) if self.context_builder is not None else ''
+
+    def get(self, file_path: str, content_hash: str) -> Optional[str]:
+        """The cached summary for this content and its imports' signatures, if any"""
+        summary = self.cache.get_cached_summary(
+            content_hash, self.model_name, self.prompt_version, self._context_hash(file_path)
+        )
+        return self._register(file_path, summary)
+
+    def lookup(self, file_path: str) -> Optional[str]:
+        """Cached summary of a file that is not being analyzed, found through its unchanged stat signature"""
+        try:
+            content_hash = self.cache.get_unchanged_hash(file_path, (self.project_path / file_path).stat())
+        except OSError:
+            return None
+        return self.get(file_path, content_hash) if content_hash else None
+
+    def summarize(self, file_path: str, content: str, content_hash: str,
+                  context: Optional[str] = None) -> Optional[str]:
+        """
+        Return the cached summary or generate one; None if the model call
+        fails. context is the file's import context if the caller built it.
+        """
+        summary = self.get(file_path, content_hash)
+        if summary:
+            return summary
+
+        if context is None:
+            context = self._context(file_path)
+
+        context_section = f"\nImported files:\n{context}\n" if context else ""
+
+        # Long files are cut so the prompt and the summary fit the context window
+        overhead = self.estimate_tokens(SUMMARY_SYSTEM_PROMPT + SUMMARY_INSTRUCTIONS + context_section) + 64
+        budget = self.config.CONTEXT_WINDOW_TOKENS - self.config.SUMMARY_MAX_TOKENS - overhead
+        max_chars = int(max(budget, 256) * self.config.CHARS_PER_TOKEN)
+        if len(content) > max_chars:
+            content = content[:max_chars] + "\n... (truncated)"
+
+        prompt = f"""
+File: {file_path}
+
+Content:
+{content}
+{context_section}
+{SUMMARY_INSTRUCTIONS}
+"""
+        try:
+            summary = self.client.generate(
+                self.model_name, prompt, system=SUMMARY_SYSTEM_PROMPT,
+                options={
+                    "num_ctx": self.config.CONTEXT_WINDOW_TOKENS,
+                    "num_predict": self.config.SUMMARY_MAX_TOKENS
+                }
+            ).strip()
+        except Exception as e:
+            logger.error(f"Error summarizing {file_path}: {str(e)}")
+            return None
+
+        if summary:
+            self.cache.cache_summary(
+                file_path, content_hash, summary, self.model_name, self.prompt_version,
+                self._context_hash(file_path)
+            )
+        return self._register(file_path, summary)
+
+    def _screen_batch(self, question: str, batch: Dict[str, str]) -> Set[str]:
+        sections = "\n\n".join(f"=== {file_path} ===\n{summary}" for file_path, summary in batch.items())
+        prompt = f"""
+File summaries:
+{sections}
+
+Question: {question}
+
+{SCREENING_INSTRUCTIONS}
+"""
+        try:
+            response = self.client.generate(
+                self.model_name, prompt, system=SCREENING_SYSTEM_PROMPT,
+                options={"num_ctx": self.config.CONTEXT_WINDOW_TOKENS}
+            )
+        except Exception as e:
+            # Without a verdict every file in the batch is read in full
+            logger.error(f"Error screening summaries: {str(e)}")
+            return set(batch)
+
+        listed = {_LIST_ITEM_RE.match(line).group(1) for line in response.splitlines()}
+        flagged = {file_path for file_path in batch if file_path in listed}
+        if not flagged and response.strip().upper() != 'NONE':
+            flagged = {file_path for file_path in batch if file_path in response}
+        return flagged
+
+    def screen(self, question: str, summaries: Dict[str, str]) -> Set[str]:
+        """
+        Ask the model which files need their full source for this question,
+        judging from summaries alone. Summaries are packed into as few prompts
+        as the context window allows and the batches run concurrently.
+        """
+        overhead = self.estimate_tokens(SCREENING_SYSTEM_PROMPT + SCREENING_INSTRUCTIONS + question) + 64
+        budget = max(self.config.CONTEXT_WINDOW_TOKENS - self.config.RESPONSE_RESERVE_TOKENS - overhead, 256)
+
+        batches: List[Dict[str, str]] = [{}]
+        used = 0
+        for file_path, summary in summaries.items():
+            tokens = self.estimate_tokens(f"=== {file_path} ===\n{summary}\n\n")
+            if batches[-1] and used + tokens > budget:
+                batches.append({})
+                used = 0
+            batches[-1][file_path] = summary
+            used += tokens
+
+        workers = max(1, min(self.config.PARALLEL_PROCESSES, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='screen') as executor:
+            verdicts = list(executor.map(lambda batch: self._screen_batch(question, batch), batches))
+        return set().union(*verdicts)
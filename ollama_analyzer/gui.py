@@ -1,12 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import threading
+import queue
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-import requests
+from typing import Dict, List, Mapping, Optional
 import json
 import os
 import sys
@@ -15,9 +15,17 @@ import subprocess
 from config import AnalyzerConfig
 from cache_manager import CacheManager
 from dependency_analyzer import DependencyAnalyzer
-from utils import get_project_files, analyze_project_structure, format_size
+from context_builder import ContextBuilder
+from file_summarizer import FileSummarizer
+from relevance_filter import RelevanceFilter
+from embedding_index import EmbeddingIndex
+from search_index import SearchIndex
+from utils import get_project_files, analyze_project_structure, format_size, LazyContents
 from analysis_summarizer import AnalysisSummarizer
 from project_analyzer import ProjectAnalyzer
+from analysis_engine import AnalysisEngine
+from ollama_client import close_clients, get_client
+from text_stream import TextStreamWriter
 
 class ConsoleHandler(logging.Handler):
     def __init__(self, console_widget):
@@ -130,6 +138,8 @@ class OllamaAnalyzerGUI:
         self.base_url = tk.StringVar(value="http://localhost:11434")
         self.is_analyzing = False
         self.is_connected = False
+        self.engine = None
+        self.stop_event = threading.Event()
 
     def create_widgets(self):
         # Project settings frame
@@ -196,6 +206,7 @@ class OllamaAnalyzerGUI:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Analyze Previous Results", command=self.analyze_previous_results)
         file_menu.add_command(label="Browse Previous Results", command=self.browse_previous_results) # Add this line
+        file_menu.add_command(label="Cache Statistics", command=self.show_cache_stats)
 
 
 
@@ -358,10 +369,11 @@ class OllamaAnalyzerGUI:
     def connect_to_ollama(self):
         self.logger.info("Attempting to connect to Ollama...")
         try:
-            response = requests.get(f"{self.base_url.get()}/api/version")
+            client = get_client(self.base_url.get(), self.config)
+            response = client.request('GET', '/api/version', retry=False)
             if response.status_code == 200:
-                model_response = requests.post(
-                    f"{self.base_url.get()}/api/generate",
+                model_response = client.request(
+                    'POST', '/api/generate',
                     json={"model": self.model_name.get(), "prompt": "test", "stream": False}
                 )
                 
@@ -421,9 +433,15 @@ class OllamaAnalyzerGUI:
     def start_analysis(self):
         if self.is_analyzing:
             self.is_analyzing = False
+            self.stop_event.set()
+            if self.engine:
+                self.engine.stop()
             self.analyze_button.config(text="Analyze")
             self.logger.info("Analysis stopped by user")
         else:
+            # A fresh event per run, so a run still winding down stays stopped
+            self.stop_event = threading.Event()
+            self.engine = None
             self.analyze_button.config(text="Stop")
             thread = threading.Thread(target=self.analyze_project)
             thread.daemon = True
@@ -444,61 +462,53 @@ class OllamaAnalyzerGUI:
         self.console_text.delete(1.0, tk.END)
         self.results_text.delete(1.0, tk.END)
         self.is_analyzing = True
+        stop_event = self.stop_event
 
         try:
             project_path = Path(project_path)
-            cache = CacheManager(project_path / '.cache')
-            analyzer = DependencyAnalyzer(project_path)
+            cache = self.open_cache(project_path)
+            analyzer = DependencyAnalyzer(project_path, self.config.PARALLEL_PROCESSES, project_path / '.cache')
 
             files = get_project_files(project_path, self.config)
-            total_files = len(files)
-            self.progress_bar["maximum"] = total_files
-
-            self.logger.info(f"Found {total_files} files to analyze")
+            self.logger.info(f"Found {len(files)} files in project")
             question = self.query_text.get(1.0, tk.END).strip()
 
-            results = {}
-            for i, file_path in enumerate(files, 1):
-                if not self.is_analyzing:
-                    break
-
-                self.logger.info(f"Analyzing file {i}/{total_files}: {file_path}")
-                try:
-                    cached_response = cache.get_cached_analysis(
-                        file_path, question, self.model_name.get()
+            try:
+                self.match_earlier_question(question, cache)
+                if self.stopped_before(stop_event, "selecting candidate files"):
+                    return
+                files = self.select_candidate_files(project_path, files, question, analyzer, cache)
+                if self.stopped_before(stop_event, "analyzing files"):
+                    return
+                context_builder = ContextBuilder(project_path, self.config, analyzer)
+                summarizer = None
+                if self.config.FILE_SUMMARIES:
+                    summarizer = FileSummarizer(
+                        project_path, self.config, cache, get_client(self.base_url.get(), self.config),
+                        self.model_name.get(), context_builder
                     )
 
-                    if cached_response:
-                        self.logger.info(f"Using cached response for {file_path}")
-                        results[file_path] = cached_response
-                    else:
-                        abs_path = project_path / file_path
-                        with open(abs_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                        metadata = {
-                            'last_modified': abs_path.stat().st_mtime,
-                            'file_type': abs_path.suffix
-                        }
-                        cache.cache_file(file_path, content, metadata)
-
-                        response = self.query_ollama(file_path, content, question)
-                        if response and response != 'NOT_RELEVANT':
-                            results[file_path] = response
-                            cache.cache_analysis(
-                                file_path, question, response, self.model_name.get()
-                            )
-
-                    if file_path in results:
-                        self.results_text.insert(tk.END, f"\n=== {file_path} ===\n{results[file_path]}\n")
-                        self.results_text.see(tk.END)
-
-                except Exception as e:
-                    self.logger.error(f"Error analyzing {file_path}: {str(e)}")
-
-                self.progress_bar["value"] = i
-                self.root.update_idletasks()
-                time.sleep(0.5)
+                self.engine = AnalysisEngine(
+                    project_path, self.config, cache,
+                    lambda *args: self.query_ollama(*args, cancel_event=stop_event), self.model_name.get(),
+                    summarizer=summarizer, dependency_graph=analyzer.graph,
+                    context_builder=context_builder, stop_event=stop_event
+                )
+                if summarizer is not None and self.config.SUMMARY_SCREENING:
+                    files = self.screen_with_summaries(files, question, summarizer, self.engine)
+                    if self.stopped_before(stop_event, "analyzing files"):
+                        return
+
+                total_files = len(files)
+                self.progress_bar["maximum"] = total_files
+                self.logger.info(f"Analyzing {total_files} candidate files")
+
+                self.analyzed_count = 0
+                self.root.after(0, self.process_result_queue, self.engine.result_queue)
+                results = self.engine.run(files, question)
+                self.logger.info(f"{self.engine.cache_hits} of {total_files} answers served from cache")
+            finally:
+                cache.close()
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_dir = Path("analysis_results")
@@ -508,34 +518,226 @@ class OllamaAnalyzerGUI:
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(results, f, indent=2)
 
+            self.logger.info(f"Analysis completed. Results saved to: {output_file}")
 
-            
+            # Reduce the per-file answers into one conclusion
+            if results and not stop_event.is_set():
+                self.logger.info("Summarizing results...")
+                writer = TextStreamWriter(self.root, self.results_text)
+                writer.write("\n=== Conclusion ===\n")
+                self.stream_conclusion(str(output_file), question, writer, stop_event)
 
-            self.logger.info(f"Analysis completed. Results saved to: {output_file}")
             messagebox.showinfo("Complete", f"Analysis completed!\nResults saved to: {output_file}")
 
         except Exception as e:
             self.logger.error(f"Error during analysis: {str(e)}")
             messagebox.showerror("Error", f"Analysis failed: {str(e)}")
         finally:
-            self.is_analyzing = False
-            self.progress_bar["value"] = 0
-            self.analyze_button.config(text="Analyze")
+            # A newer run may have started after this one was stopped; leave its state alone
+            if stop_event is self.stop_event:
+                self.is_analyzing = False
+                self.progress_bar["value"] = 0
+                self.analyze_button.config(text="Analyze")
+
+    def stopped_before(self, stop_event: threading.Event, stage: str) -> bool:
+        """Whether Stop was pressed, checked between the stages of a run"""
+        if stop_event.is_set():
+            self.logger.info(f"Analysis stopped before {stage}")
+            return True
+        return False
+
+    def match_earlier_question(self, question: str, cache: CacheManager):
+        """Let a rephrased question reuse the cached answers of an earlier one"""
+        embed_fn = None
+        if self.config.EMBEDDING_MODEL and self.config.QUESTION_SIMILARITY_THRESHOLD > 0:
+            client = get_client(self.base_url.get(), self.config)
+            embed_fn = lambda text: client.embed(self.config.EMBEDDING_MODEL, text)
+
+        earlier = cache.resolve_question(
+            question, embed_fn, self.config.EMBEDDING_MODEL, self.config.QUESTION_SIMILARITY_THRESHOLD
+        )
+        if earlier:
+            self.logger.info(f"Question matches earlier question '{earlier}'; reusing its cached answers")
+
+    def select_candidate_files(self, project_path: Path, files: List[str], question: str,
+                               analyzer: DependencyAnalyzer, cache: CacheManager) -> List[str]:
+        """
+        Keep only the top-K files the local pre-filter ranks as relevant to the
+        question. The dependency graph is synced either way, since the prompts
+        include each file's imports.
+        """
+        content_hashes, read = {}, {}
+        for file_path in files:
+            abs_path = project_path / file_path
+            try:
+                stat_result = abs_path.stat()
+                # Unchanged files keep their cached hash and are never opened
+                content_hash = cache.get_unchanged_hash(file_path, stat_result)
+                if content_hash is None:
+                    with open(abs_path, 'r', encoding='utf-8') as f:
+                        content = read[file_path] = f.read()
+                    metadata = {
+                        'last_modified': stat_result.st_mtime,
+                        'file_type': abs_path.suffix
+                    }
+                    content_hash = cache.cache_file(file_path, content, metadata, stat_result)
+                content_hashes[file_path] = content_hash
+            except Exception as e:
+                self.logger.error(f"Error reading {file_path}: {str(e)}")
 
-    def query_ollama(self, file_path: str, content: str, question: str) -> str:
-        """Query Ollama with file content and question"""
-        url = f"{self.base_url.get()}/api/generate"
+        # Indexes only read the files whose hash changed since they last saw them
+        contents = LazyContents(project_path, content_hashes, read)
+
+        # Only files whose hash changed since the last run are re-parsed
+        analyzer.sync_dependency_graph(content_hashes, contents.get)
+        if self.config.RELEVANCE_TOP_K <= 0 or len(files) <= self.config.RELEVANCE_TOP_K:
+            return files
+
+        semantic_scores = self.semantic_file_scores(project_path, contents, content_hashes, question)
+
+        # Only files whose hash changed since the last run are re-tokenized
+        search_index = SearchIndex(project_path / '.cache', analyzer)
+        try:
+            search_index.sync(content_hashes, contents.get)
+            return RelevanceFilter(self.config, analyzer, search_index).select(
+                contents, question, semantic_scores=semantic_scores
+            )
+        finally:
+            search_index.close()
+
+    def screen_with_summaries(self, files: List[str], question: str,
+                              summarizer: FileSummarizer, engine: AnalysisEngine) -> List[str]:
+        """
+        Drop candidates whose cached summaries show they are not needed for the
+        question. Files that already have a cached answer are kept without
+        screening, since they cost no model call, and files without a summary
+        yet are always analyzed in full.
+        """
+        summaries = {}
+        for file_path in files:
+            if engine.has_cached_answer(file_path, question):
+                continue
+            summary = summarizer.lookup(file_path)
+            if summary:
+                summaries[file_path] = summary
+        if not summaries:
+            return files
+
+        flagged = summarizer.screen(question, summaries)
+        kept = [file_path for file_path in files if file_path not in summaries or file_path in flagged]
+        self.logger.info(
+            f"Summaries screened {len(summaries)} files: {len(flagged)} need full source, "
+            f"{len(files) - len(kept)} skipped"
+        )
+        return kept
+
+    def semantic_file_scores(self, project_path: Path, contents: Mapping[str, str],
+                             content_hashes: Dict[str, str], question: str) -> Optional[Dict[str, float]]:
+        """Embedding similarity per file, or None when no embedding model is configured"""
+        if not self.config.EMBEDDING_MODEL:
+            return None
+
+        index = EmbeddingIndex(
+            project_path / '.cache',
+            get_client(self.base_url.get(), self.config),
+            self.config.EMBEDDING_MODEL,
+            max_chars=self.config.EMBEDDING_CHUNK_CHARS,
+            workers=self.config.PARALLEL_PROCESSES
+        )
+        try:
+            embedded = index.update(contents, content_hashes)
+            if embedded:
+                self.logger.info(f"Embedded {embedded} chunks with {self.config.EMBEDDING_MODEL}")
+            scores = index.file_scores(question, self.config.RELEVANCE_TOP_K)
+            index.compact_in_background()
+            return scores
+        except Exception as e:
+            # Keyword ranking still works without embeddings
+            self.logger.error(f"Embedding search failed, using keyword ranking only: {str(e)}")
+            return None
+        finally:
+            index.close()
+
+    def open_cache(self, project_path: Path) -> CacheManager:
+        return CacheManager(
+            project_path / '.cache',
+            flush_rows=self.config.CACHE_FLUSH_ROWS,
+            flush_interval_ms=self.config.CACHE_FLUSH_INTERVAL_MS,
+            expiry_hours=self.config.CACHE_EXPIRY_HOURS,
+            max_size_mb=self.config.MAX_CACHE_SIZE_MB
+        )
+
+    def show_cache_stats(self):
+        """Show hit rate, size and eviction statistics for the project cache"""
+        if not self.project_path.get():
+            messagebox.showwarning("No Project", "Please select a project directory")
+            return
+
+        cache = self.open_cache(Path(self.project_path.get()))
+        try:
+            stats = cache.get_stats()
+        finally:
+            cache.close()
+
+        report = (
+            f"Hit rate: {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)\n"
+            f"Size: {format_size(stats['bytes'])} of {format_size(stats['max_bytes'])}\n"
+            f"Cached files: {stats['file_entries']}\n"
+            f"Cached analyses: {stats['analysis_entries']}\n"
+            f"Cached summaries: {stats['summary_entries']}\n"
+            f"Questions matched to earlier ones: {stats['question_matches']}\n"
+            f"Evictions: {stats['evictions']}\n"
+            f"Expired: {stats['expired']}"
+        )
+        self.logger.info(f"Cache statistics:\n{report}")
+        messagebox.showinfo("Cache Statistics", report)
+
+    def process_result_queue(self, result_queue: queue.Queue):
+        """Drain finished file analyses from the engine on the Tk thread"""
+        try:
+            while True:
+                result = result_queue.get_nowait()
+                if result is None:
+                    return
+
+                self.analyzed_count += 1
+                self.logger.info(
+                    f"Analyzed file {self.analyzed_count}/{self.progress_bar['maximum']}: {result.file_path}"
+                )
+                if result.cached:
+                    self.logger.info(f"Using cached response for {result.file_path}")
+                if result.response:
+                    self.results_text.insert(tk.END, f"\n=== {result.file_path} ===\n{result.response}\n")
+                    self.results_text.see(tk.END)
+                self.progress_bar["value"] = self.analyzed_count
+        except queue.Empty:
+            pass
+        self.root.after(100, self.process_result_queue, result_queue)
+
+    def query_ollama(self, file_path: str, content: str, question: str, context: str = "",
+                     cancel_event: Optional[threading.Event] = None) -> str:
+        """
+        Query Ollama with file content, the context of its imports and the
+        question; cancel_event defaults to the current run's stop event
+        """
+        client = get_client(self.base_url.get(), self.config)
 
         system_prompt = f"""You are analyzing the file {file_path} from a Next.js project.
 Focus on providing specific, actionable insights related to the question.
 If the file is not relevant to the question, respond with 'NOT_RELEVANT'."""
 
+        # Summaries or exported signatures of the file's imports, so the model does not have to guess them
+        imports_section = f"""
+Imported files (summaries or exported signatures):
+{context}
+""" if context else ""
+
         prompt = f"""
 File: {file_path}
 
 Content:
 {content}
-
+{imports_section}
 Question: {question}
 
 Please provide a detailed analysis focusing specifically on this file and the question asked.
@@ -550,15 +752,11 @@ Consider:
 """
 
         try:
-            response = requests.post(url, json={
-                "model": self.model_name.get(),
-                "prompt": prompt,
-                "system": system_prompt,
-                "stream": False
-            }, timeout=30)
-
-            response.raise_for_status()
-            return response.json()['response']
+            # Stream so that Stop closes the connection and frees the model slot mid-answer
+            return "".join(client.generate_stream(
+                self.model_name.get(), prompt, system=system_prompt,
+                cancel_event=cancel_event if cancel_event is not None else self.stop_event
+            ))
         except Exception as e:
             self.logger.error(f"Error querying Ollama: {str(e)}")
             raise
@@ -574,13 +772,38 @@ Consider:
         )
         if file_path:
             question = self.query_text.get(1.0, tk.END).strip()
-            summarizer = AnalysisSummarizer(self.base_url.get(), self.model_name.get())
-            conclusion = summarizer.summarize_results(
-                results_file=file_path,
-                original_query=question
-            )
             self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, conclusion)
+            self.notebook.select(1)
+
+            self.stop_event = threading.Event()
+            self.is_analyzing = True
+            self.analyze_button.config(text="Stop")
+
+            writer = TextStreamWriter(self.root, self.results_text)
+            thread = threading.Thread(
+                target=self.stream_conclusion, args=(file_path, question, writer, self.stop_event)
+            )
+            thread.daemon = True
+            thread.start()
+
+    def stream_conclusion(self, results_file: str, question: str, writer: TextStreamWriter,
+                          stop_event: threading.Event):
+        """Stream the summarizer's conclusion into the results tab as it is generated"""
+        try:
+            summarizer = AnalysisSummarizer(self.base_url.get(), self.model_name.get(), self.config)
+            summarizer.summarize_results(
+                results_file=results_file,
+                original_query=question,
+                on_token=writer.write,
+                cancel_event=stop_event
+            )
+        except Exception as e:
+            self.logger.error(f"Error summarizing results: {str(e)}")
+        finally:
+            writer.close()
+            if stop_event is self.stop_event:
+                self.is_analyzing = False
+                self.analyze_button.config(text="Analyze")
 
     def save_results(self):
         """Save analysis results to a file"""
@@ -611,7 +834,12 @@ Consider:
         if self.is_analyzing:
             if messagebox.askokcancel("Quit", "Analysis is in progress. Do you want to stop and quit?"):
                 self.is_analyzing = False
+                self.stop_event.set()
+                if self.engine:
+                    self.engine.stop()
                 time.sleep(1)  # Give time for threads to clean up
+                close_clients()
                 self.root.destroy()
         else:
+            close_clients()
             self.root.destroy()
\ No newline at end of file
@@ -0,0 +1,194 @@
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger('IgnoreRules')
+
+IGNORE_FILENAMES = ('.gitignore', '.eslintignore')
+
+def _translate(pattern: str) -> str:
+    """Translate the body of a gitignore pattern into a regex fragment"""
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == n:
+            parts.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif c == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif c == '?':
+            parts.append('[^/]')
+            i += 1
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body[0] == '!':
+                    body = '^' + body[1:]
+                parts.append(f'[{body}]')
+                i = end + 1
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return ''.join(parts)
+
+def parse_ignore_lines(lines: Iterable[str]) -> List[Tuple[re.Pattern, bool, bool]]:
+    """Parse gitignore-syntax lines into (regex, negate, dir_only) rules"""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+        if not line or line.startswith('#'):
+            continue
+
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+
+        # A slash anywhere but the end anchors the pattern to the ignore file's directory
+        anchored = '/' in line
+        body = _translate(line.lstrip('/'))
+        regex = f'^{body}$' if anchored else f'^(?:.*/)?{body}$'
+        rules.append((re.compile(regex), negate, dir_only))
+    return rules
+
+class _RuleSet:
+    """Rules from the ignore files of one directory, matched against paths relative to it"""
+
+    def __init__(self, rules: List[Tuple[re.Pattern, bool, bool]]):
+        self.rules = rules
+        self.has_negation = any(negate for _, negate, _ in rules)
+        if not self.has_negation:
+            # Without negations order does not matter, so collapse into single regexes
+            self._dir_re = self._combine(rules)
+            self._file_re = self._combine([rule for rule in rules if not rule[2]])
+
+    @staticmethod
+    def _combine(rules) -> Optional[re.Pattern]:
+        if not rules:
+            return None
+        return re.compile('|'.join(f'(?:{regex.pattern})' for regex, _, _ in rules))
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a negation, None if no rule applies"""
+        if not self.has_negation:
+            combined = self._dir_re if is_dir else self._file_re
+            return True if combined is not None and combined.match(path) else None
+
+        # Last matching rule wins
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                return not negate
+        return None
+
+class IgnoreRules:
+    """
+    .gitignore/.eslintignore rules for a project, parsed once per directory.
+    Walkers call load_directory before checking that directory's entries and
+    should prune ignored directories, since is_ignored only looks at the path
+    itself (as git does, files inside an ignored directory cannot be re-included).
+    """
+
+    def __init__(self, project_root: Path, filenames: Iterable[str] = IGNORE_FILENAMES):
+        self.project_root = Path(project_root)
+        self.filenames = tuple(filenames)
+        self._loaded = set()
+        self._rule_sets: Dict[str, _RuleSet] = {}
+
+    def load_directory(self, relative_dir: str, names: Optional[Iterable[str]] = None):
+        """
+        Parse the ignore files in relative_dir if not already done.
+        Pass the directory's entry names when known to avoid extra stat calls.
+        """
+        key = relative_dir.replace(os.sep, '/').strip('/')
+        if key == '.':
+            key = ''
+        if key in self._loaded:
+            return
+        self._loaded.add(key)
+
+        candidates = self.filenames if names is None else [n for n in names if n in self.filenames]
+        rules = []
+        for filename in candidates:
+            ignore_file = self.project_root / key / filename
+            try:
+                with open(ignore_file, 'r', encoding='utf-8', errors='replace') as f:
+                    rules.extend(parse_ignore_lines(f))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Could not read {ignore_file}: {e}")
+
+        if rules:
+            self._rule_sets[key] = _RuleSet(rules)
+
+    def is_ignored(self, relative_path: str, is_dir: bool = False) -> bool:
+        if not self._rule_sets:
+            return False
+
+        path = relative_path.replace(os.sep, '/').strip('/')
+        parts = path.split('/')
+        ignored = False
+
+        # Rules in deeper directories take precedence over their parents
+        for depth in range(len(parts)):
+            base = '/'.join(parts[:depth])
+            rule_set = self._rule_sets.get(base)
+            if rule_set is None:
+                continue
+            result = rule_set.match('/'.join(parts[depth:]), is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+
+def walk_project(project_root, ignore_dirs: Iterable[str] = ()) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """
+    os.walk over a project that prunes ignore_dirs and anything matched by the
+    project's ignore files. Yields (relative_dir, dirnames, filenames) with
+    ignored names already removed; relative_dir is '' for the root.
+    """
+    project_root = str(project_root)
+    ignore_dirs = set(ignore_dirs)
+    rules = IgnoreRules(Path(project_root))
+
+    for root, dirs, filenames in os.walk(project_root):
+        relative_dir = os.path.relpath(root, project_root)
+        if relative_dir == '.':
+            relative_dir = ''
+        rules.load_directory(relative_dir, filenames)
+
+        dirs[:] = [
+            d for d in dirs
+            if d not in ignore_dirs and not rules.is_ignored(os.path.join(relative_dir, d), True)
+        ]
+        kept = [
+            f for f in filenames
+            if not rules.is_ignored(os.path.join(relative_dir, f), False)
+        ]
+        yield relative_dir, dirs, kept
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import posixpath
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('ImportResolver')
+
+CONFIG_FILENAMES = ('tsconfig.json', 'jsconfig.json')
+RESOLVE_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs', '.d.ts')
+
+_JSONC_RE = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r'("(?:\\.|[^"\\])*")|,(\s*[}\]])')
+
+def load_jsonc(path: Path) -> Dict:
+    """Parse a tsconfig-style JSON file, which may contain comments and trailing commas"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    text = _JSONC_RE.sub(lambda m: m.group(1) or '', text)
+    text = _TRAILING_COMMA_RE.sub(lambda m: m.group(1) or m.group(2), text)
+    return json.loads(text)
+
+class ImportResolver:
+    """
+    Resolves import specifiers to project files without touching the
+    filesystem: candidates are checked against the in-memory set of known
+    files. Relative imports, tsconfig/jsconfig 'paths' aliases (such as '@/*')
+    and 'baseUrl' imports are supported, including directory index files.
+    Lookups are memoized per (source directory, specifier).
+    """
+
+    def __init__(self, project_root: Path, known_files: Iterable[str]):
+        self.project_root = Path(project_root)
+        # Lookups use '/' separators; results are mapped back to the caller's paths
+        self.known_files: Dict[str, str] = {
+            file_path.replace(os.sep, '/'): file_path for file_path in known_files
+        }
+        self.base_url: Optional[str] = None
+        self.paths: List[Tuple[str, Optional[str], List[str]]] = []
+        self._memo: Dict[Tuple[str, str], Optional[str]] = {}
+        self.load_config()
+
+    def load_config(self):
+        """Read baseUrl and paths from the project's tsconfig.json or jsconfig.json"""
+        for filename in CONFIG_FILENAMES:
+            config_path = self.project_root / filename
+            if config_path.exists():
+                options = self._compiler_options(config_path.resolve(), set())
+                break
+        else:
+            return
+
+        self.base_url = options.get('baseUrl')
+        # 'paths' entries are relative to baseUrl, or to their config file without one
+        paths_base = self.base_url if self.base_url is not None else options.get('pathsDir', '')
+        for pattern, targets in (options.get('paths') or {}).items():
+            prefix, star, suffix = pattern.partition('*')
+            resolved_targets = [posixpath.normpath(posixpath.join(paths_base, target)) for target in targets]
+            self.paths.append((prefix, suffix if star else None, resolved_targets))
+
+        # TypeScript prefers the pattern with the longest prefix
+        self.paths.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def _compiler_options(self, config_path: Path, seen: set) -> Dict:
+        """
+        compilerOptions merged over a relative 'extends' chain, with baseUrl
+        made relative to the project root and the directory 'paths' came from
+        """
+        if config_path in seen:
+            return {}
+        seen.add(config_path)
+
+        try:
+            data = load_jsonc(config_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read {config_path}: {e}")
+            return {}
+
+        options = {}
+        extends = data.get('extends')
+        if isinstance(extends, str) and extends.startswith('.'):
+            parent = config_path.parent / extends
+            if parent.suffix != '.json':
+                parent = parent.with_name(parent.name + '.json')
+            options = self._compiler_options(parent.resolve(), seen)
+
+        config_dir = os.path.relpath(config_path.parent, self.project_root.resolve()).replace(os.sep, '/')
+        own = data.get('compilerOptions') or {}
+        if 'baseUrl' in own:
+            options['baseUrl'] = posixpath.normpath(posixpath.join(config_dir, own['baseUrl']))
+        if 'paths' in own:
+            options['paths'] = own['paths']
+            options['pathsDir'] = config_dir
+        return options
+
+    def _find(self, base: str) -> Optional[str]:
+        """Match base as a file, base plus an extension, or a directory index file"""
+        base = posixpath.normpath(base)
+        if base.startswith('../') or base == '..':
+            return None
+        if base in self.known_files:
+            return base
+
+        # './util.js' in TypeScript sources usually refers to util.ts
+        stem, ext = posixpath.splitext(base)
+        if ext in ('.js', '.jsx', '.mjs', '.cjs'):
+            for candidate_ext in ('.ts', '.tsx', '.mts', '.cts'):
+                if stem + candidate_ext in self.known_files:
+                    return stem + candidate_ext
+
+        for candidate_ext in RESOLVE_EXTENSIONS:
+            if base + candidate_ext in self.known_files:
+                return base + candidate_ext
+        for candidate_ext in RESOLVE_EXTENSIONS:
+            index = posixpath.join(base, 'index' + candidate_ext)
+            if index in self.known_files:
+                return index
+        return None
+
+    def _resolve(self, source_dir: str, specifier: str) -> Optional[str]:
+        if specifier.startswith('.'):
+            return self._find(posixpath.join(source_dir, specifier))
+        if specifier.startswith('/'):
+            return self._find(specifier.lstrip('/'))
+
+        for prefix, suffix, targets in self.paths:
+            if suffix is None:
+                if specifier != prefix:
+                    continue
+                wildcard = ''
+            elif (specifier.startswith(prefix) and specifier.endswith(suffix)
+                  and len(specifier) >= len(prefix) + len(suffix)):
+                wildcard = specifier[len(prefix):len(specifier) - len(suffix)]
+            else:
+                continue
+
+            for target in targets:
+                found = self._find(target.replace('*', wildcard, 1))
+                if found:
+                    return found
+            # A matching pattern is final, as in TypeScript, unless baseUrl can still resolve it
+            break
+
+        if self.base_url is not None:
+            return self._find(posixpath.join(self.base_url, specifier))
+        return None
+
+    def resolve(self, source_file: str, specifier: str) -> Optional[str]:
+        """Return the project file an import refers to, or None for packages and unknown files"""
+        source_dir = posixpath.dirname(source_file.replace(os.sep, '/'))
+        key = (source_dir, specifier)
+        if key not in self._memo:
+            found = self._resolve(source_dir, specifier)
+            self._memo[key] = self.known_files[found] if found is not None else None
+        return self._memo[key]
@@ -0,0 +1,280 @@
+import asyncio
+import functools
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger('OllamaClient')
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 1
+DEFAULT_MAX_CONNECTIONS = 10
+
+# get_client's default: take the timeout from config, or DEFAULT_TIMEOUT without one
+_CONFIG_TIMEOUT = object()
+
+# How often a streaming call's watcher checks its cancel event
+CANCEL_POLL_INTERVAL = 0.1
+
+class GenerationCancelled(Exception):
+    """Raised when a streaming generation is stopped by its cancel event"""
+
+# Connections used by the cancellable call running on this thread, if any
+_tracked = threading.local()
+
+class _TrackedConnectionMixin:
+    """Records the connection a cancellable request goes out on, so its socket can be shut from another thread"""
+
+    def request(self, *args, **kwargs):
+        connections = getattr(_tracked, 'connections', None)
+        if connections is not None:
+            connections.append(self)
+        return super().request(*args, **kwargs)
+
+class _TrackedHTTPConnection(_TrackedConnectionMixin, HTTPConnection):
+    pass
+
+class _TrackedHTTPSConnection(_TrackedConnectionMixin, HTTPSConnection):
+    pass
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+class OllamaClient:
+    """
+    Pooled keep-alive client for the Ollama HTTP API.
+    A single requests.Session is shared by every caller, so connections are
+    reused instead of opening a new socket per request. The async methods run
+    the same session on a bounded thread pool. A timeout of None waits
+    indefinitely.
+    """
+
+    def __init__(self, base_url: str, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, retry_delay: float = DEFAULT_RETRY_DELAY,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_connections = max_connections
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            'http': _TrackedHTTPConnectionPool,
+            'https': _TrackedHTTPSConnectionPool
+        }
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def request(self, method: str, path: str, retry: bool = True,
+                timeout: Optional[float] = None, cancel_event: Optional[threading.Event] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a request, retrying connection errors, timeouts and 5xx responses.
+        A POST that times out while waiting for the response is not retried:
+        Ollama may still be generating it, and sending it again would queue
+        the same work a second time. Nothing is sent or retried once
+        cancel_event is set; GenerationCancelled is raised instead.
+        """
+        url = f"{self.base_url}{path}"
+        attempts = self.max_retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled("Generation cancelled")
+            try:
+                response = self.session.request(
+                    method, url, timeout=timeout or self.timeout, **kwargs
+                )
+                if response.status_code < 500 or attempt == attempts - 1:
+                    return response
+                logger.warning(f"{method} {path} returned {response.status_code}, retrying")
+                # A streamed response keeps its pooled connection checked out until closed
+                response.close()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled("Generation cancelled") from e
+                if attempt == attempts - 1 or (
+                        method == 'POST' and isinstance(e, requests.exceptions.ReadTimeout)):
+                    raise
+                logger.warning(f"{method} {path} failed ({str(e)}), retrying")
+
+            time.sleep(self.retry_delay * (attempt + 1))
+
+    def post_json(self, path: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        response = self.request('POST', path, json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _generate_payload(self, model: str, prompt: str, system: Optional[str],
+                          options: Optional[Dict], stream: bool) -> Dict:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        if system:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+        return payload
+
+    def generate(self, model: str, prompt: str, system: Optional[str] = None,
+                 options: Optional[Dict] = None, timeout: Optional[float] = None) -> str:
+        """Run a non-streaming /api/generate call and return the response text"""
+        payload = self._generate_payload(model, prompt, system, options, stream=False)
+        return self.post_json('/api/generate', payload, timeout=timeout).get('response', '')
+
+    def generate_stream(self, model: str, prompt: str, system: Optional[str] = None,
+                        options: Optional[Dict] = None, timeout: Optional[float] = None,
+                        cancel_event: Optional[threading.Event] = None) -> Iterator[str]:
+        """
+        Yield response tokens from /api/generate as Ollama produces them.
+        Setting cancel_event shuts the connection's socket from a watcher
+        thread within CANCEL_POLL_INTERVAL, even while Ollama is still
+        processing the prompt and has sent nothing back. Ollama then stops
+        and frees the model slot, and GenerationCancelled is raised.
+        """
+        payload = self._generate_payload(model, prompt, system, options, stream=True)
+        connections = []
+        finished = threading.Event()
+        if cancel_event is not None:
+            threading.Thread(
+                target=self._shut_on_cancel, args=(cancel_event, connections, finished),
+                name='ollama-cancel', daemon=True
+            ).start()
+
+        try:
+            _tracked.connections = connections
+            try:
+                response = self.request('POST', '/api/generate', json=payload, timeout=timeout,
+                                        cancel_event=cancel_event, stream=True)
+            finally:
+                _tracked.connections = None
+
+            try:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise GenerationCancelled("Generation cancelled")
+                    if not line:
+                        continue
+
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        raise RuntimeError(chunk['error'])
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as e:
+            # The watcher shutting the socket surfaces as a broken connection
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled("Generation cancelled") from e
+            raise
+        finally:
+            finished.set()
+
+    @staticmethod
+    def _shut_on_cancel(cancel_event: threading.Event, connections: List, finished: threading.Event):
+        """Watcher for generate_stream: shut the call's sockets once cancel_event is set"""
+        while not finished.wait(CANCEL_POLL_INTERVAL):
+            if not cancel_event.is_set():
+                continue
+            for connection in connections:
+                sock = getattr(connection, 'sock', None)
+                if sock is not None:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
+    def embed(self, model: str, prompt: str, timeout: Optional[float] = None) -> List[float]:
+        """Return the /api/embeddings vector for prompt"""
+        payload = {"model": model, "prompt": prompt}
+        return self.post_json('/api/embeddings', payload, timeout=timeout).get('embedding', [])
+
+    def is_available(self) -> bool:
+        """Check that the Ollama service answers on /api/version"""
+        try:
+            return self.request('GET', '/api/version', retry=False, timeout=5).status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_connections, thread_name_prefix='ollama'
+                )
+            return self._executor
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    async def apost_json(self, path: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        return await self._run(self.post_json, path, payload, timeout=timeout)
+
+    async def agenerate(self, model: str, prompt: str, system: Optional[str] = None,
+                        options: Optional[Dict] = None, timeout: Optional[float] = None) -> str:
+        return await self._run(self.generate, model, prompt, system=system, options=options, timeout=timeout)
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.session.close()
+
+_clients: Dict[Tuple, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url: str, config=None, timeout=_CONFIG_TIMEOUT) -> OllamaClient:
+    """
+    Return the shared client for base_url and these settings, creating it on
+    first use. Timeouts, retries and pool size are read from config
+    (AnalyzerConfig or CodeGenerationConfig) when one is given; an explicit
+    timeout, including None for no timeout, overrides the configured one.
+    """
+    if timeout is _CONFIG_TIMEOUT:
+        timeout = getattr(config, 'API_TIMEOUT', DEFAULT_TIMEOUT)
+    settings = (
+        timeout,
+        getattr(config, 'MAX_RETRIES', DEFAULT_MAX_RETRIES),
+        getattr(config, 'RETRY_DELAY', DEFAULT_RETRY_DELAY),
+        getattr(config, 'MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+    )
+    key = (base_url.rstrip('/'),) + settings
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OllamaClient(key[0], *settings)
+            _clients[key] = client
+        return client
+
+def close_clients():
+    """Close every shared client and its pooled connections; the GUIs call this on exit"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -1,9 +1,38 @@
 import logging
-import requests
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 from config import AnalyzerConfig
 from utils import get_project_files
+from ollama_client import get_client
+
+SYSTEM_PROMPT = """You are a Next.js expert analyzing an entire project.
+Your task is to:
+1. Find relevant files and code sections that answer the user's question
+2. Provide specific file paths and line numbers where changes are needed
+3. Give clear, actionable steps to implement the solution
+4. Consider project structure and dependencies
+
+When referencing code, always include the file path and specify exactly where changes should be made."""
+
+ANSWER_INSTRUCTIONS = """Please provide a detailed answer that includes:
+1. Which specific files need to be modified
+2. Exact code changes needed
+3. Step-by-step implementation instructions
+4. Any dependencies or considerations"""
+
+@dataclass
+class ContextChunk:
+    """A batch of file sections that fits in one prompt"""
+    sections: List[str] = field(default_factory=list)
+    file_indices: List[int] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def content(self) -> str:
+        return "\n".join(self.sections)
 
 class ProjectAnalyzer:
     def __init__(self, project_path: Path, config: AnalyzerConfig):
@@ -12,71 +41,226 @@ class ProjectAnalyzer:
         self.consolidated_content = ""
         self.file_map = {}
         self.current_index = 0
+        # (file index, path, content, estimated tokens) in project order
+        self.file_sections: List[Tuple[int, str, str, int]] = []
+
+    def estimate_tokens(self, text: str) -> int:
+        """Rough token count; code tokenizes denser than prose, so err high"""
+        return math.ceil(len(text) / self.config.CHARS_PER_TOKEN)
 
     def consolidate_project(self) -> str:
         """Consolidate all project files into a single string with file markers"""
         consolidated = []
         files = get_project_files(self.project_path, self.config)
-        
+
         for file_path in files:
             abs_path = self.project_path / file_path
             try:
                 with open(abs_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                    
+
                 # Store file location for later reference
                 self.file_map[self.current_index] = file_path
-                
+                self.file_sections.append(
+                    (self.current_index, file_path, content, self.estimate_tokens(content))
+                )
+
                 # Add file marker and content
                 consolidated.append(f"\n=== FILE_START_{self.current_index}: {file_path} ===\n")
                 consolidated.append(content)
                 consolidated.append(f"\n=== FILE_END_{self.current_index} ===\n")
-                
+
                 self.current_index += 1
-                
+
             except Exception as e:
                 logging.error(f"Error reading {file_path}: {str(e)}")
-                
+
         self.consolidated_content = "\n".join(consolidated)
         return self.consolidated_content
 
-    def query_ollama(self, base_url: str, model_name: str, question: str) -> str:
-        """Query Ollama with the entire project context"""
-        url = f"{base_url}/api/generate"
-        
-        system_prompt = """You are a Next.js expert analyzing an entire project.
-Your task is to:
-1. Find relevant files and code sections that answer the user's question
-2. Provide specific file paths and line numbers where changes are needed
-3. Give clear, actionable steps to implement the solution
-4. Consider project structure and dependencies
+    def _split_content(self, content: str, budget: int) -> List[str]:
+        """Split an oversized file on line boundaries into pieces under budget"""
+        max_chars = max(1, int(budget * self.config.CHARS_PER_TOKEN))
+        pieces, current, current_len = [], [], 0
+        for line in content.splitlines(keepends=True):
+            # A single minified line can exceed the budget on its own
+            while len(line) > max_chars:
+                if current:
+                    pieces.append(''.join(current))
+                    current, current_len = [], 0
+                pieces.append(line[:max_chars])
+                line = line[max_chars:]
+            if current_len + len(line) > max_chars:
+                pieces.append(''.join(current))
+                current, current_len = [], 0
+            current.append(line)
+            current_len += len(line)
+        if current:
+            pieces.append(''.join(current))
+        return pieces
 
-When referencing code, always include the file path and specify exactly where changes should be made."""
+    def build_chunks(self, budget: int) -> List[ContextChunk]:
+        """
+        Pack file sections, in project order, into chunks of at most budget tokens.
+        Files larger than a whole chunk are split into numbered parts.
+        """
+        chunks = []
+        current = ContextChunk()
+
+        def add(section: str, index: int):
+            nonlocal current
+            tokens = self.estimate_tokens(section)
+            if current.sections and current.tokens + tokens > budget:
+                chunks.append(current)
+                current = ContextChunk()
+            current.sections.append(section)
+            current.file_indices.append(index)
+            current.tokens += tokens
 
-        prompt = f"""
+        for index, file_path, content, tokens in self.file_sections:
+            marker_tokens = self.estimate_tokens(f"=== FILE_START_{index}: {file_path} (part 00/00) ===\n=== FILE_END_{index} ===")
+            if tokens + marker_tokens <= budget:
+                add(f"=== FILE_START_{index}: {file_path} ===\n{content}\n=== FILE_END_{index} ===", index)
+                continue
+
+            pieces = self._split_content(content, budget - marker_tokens)
+            for part, piece in enumerate(pieces, 1):
+                add(f"=== FILE_START_{index}: {file_path} (part {part}/{len(pieces)}) ===\n"
+                    f"{piece}\n=== FILE_END_{index} ===", index)
+
+        if current.sections:
+            chunks.append(current)
+        return chunks
+
+    def _prompt_budget(self, question: str) -> int:
+        """Tokens left for file content once the prompt scaffolding and answer are reserved"""
+        overhead = self.estimate_tokens(SYSTEM_PROMPT + ANSWER_INSTRUCTIONS + question) + 64
+        budget = self.config.CONTEXT_WINDOW_TOKENS - self.config.RESPONSE_RESERVE_TOKENS - overhead
+        return max(budget, 256)
+
+    def _generate(self, base_url: str, model_name: str, prompt: str) -> str:
+        client = get_client(base_url, self.config)
+        return client.generate(
+            model_name, prompt, system=SYSTEM_PROMPT,
+            options={"num_ctx": self.config.CONTEXT_WINDOW_TOKENS}, timeout=60
+        )
+
+    def _query_chunk(self, base_url: str, model_name: str, question: str,
+                     chunk: ContextChunk, part: int, total: int) -> str:
+        if total == 1:
+            prompt = f"""
 Project Structure:
-{self.consolidated_content}
+{chunk.content}
 
 Question: {question}
 
-Please provide a detailed answer that includes:
-1. Which specific files need to be modified
-2. Exact code changes needed
-3. Step-by-step implementation instructions
-4. Any dependencies or considerations
+{ANSWER_INSTRUCTIONS}
 """
+        else:
+            prompt = f"""
+Project Files (batch {part} of {total}):
+{chunk.content}
+
+Question: {question}
+
+You are seeing only part of the project. If nothing in these files is relevant
+to the question, reply with exactly NOT_RELEVANT.
+
+{ANSWER_INSTRUCTIONS}
+"""
+        return self._generate(base_url, model_name, prompt)
+
+    def _reduce(self, base_url: str, model_name: str, question: str, answers: List[str]) -> str:
+        """Merge partial answers, in several rounds if they do not fit one prompt"""
+        budget = self._prompt_budget(question)
+        # Cap each answer so two always fit one merge; estimate_tokens rounds up, so halve first
+        max_chars = int((budget // 2) * self.config.CHARS_PER_TOKEN)
+
+        while True:
+            answers = [answer[:max_chars] for answer in answers]
+            groups, current, current_tokens = [], [], 0
+            for answer in answers:
+                tokens = self.estimate_tokens(answer)
+                if current and current_tokens + tokens > budget:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append(answer)
+                current_tokens += tokens
+            if current:
+                groups.append(current)
+            if len(groups) == len(answers):
+                # Nothing paired up, so pair neighbours anyway rather than loop without merging
+                groups = [answers[i:i + 2] for i in range(0, len(answers), 2)]
+
+            merged = []
+            for group in groups:
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                partials = "\n\n".join(
+                    f"--- Partial answer {i} ---\n{answer}" for i, answer in enumerate(group, 1)
+                )
+                prompt = f"""
+The project was analyzed in batches. These are the answers for the batches that
+contained relevant files:
+
+{partials}
+
+Question: {question}
+
+Combine them into one consistent answer. Keep every file path and code change,
+remove duplicates and resolve contradictions.
+
+{ANSWER_INSTRUCTIONS}
+"""
+                merged.append(self._generate(base_url, model_name, prompt))
+
+            if len(merged) == 1:
+                return merged[0]
+            answers = merged
+
+    def query_ollama(self, base_url: str, model_name: str, question: str) -> str:
+        """
+        Query Ollama with the project context. Files are packed into batches that
+        fit the context window, the batches are queried concurrently and the
+        relevant answers are merged in a final reduce step.
+        """
+        chunks = self.build_chunks(self._prompt_budget(question))
+        if not chunks:
+            chunks = [ContextChunk()]
 
         try:
-            response = requests.post(url, json={
-                "model": model_name,
-                "prompt": prompt,
-                "system": system_prompt,
-                "stream": False
-            }, timeout=60)
-            
-            response.raise_for_status()
-            return response.json()['response']
-            
+            if len(chunks) == 1:
+                return self._query_chunk(base_url, model_name, question, chunks[0], 1, 1)
+
+            logging.info(f"Querying {len(chunks)} context batches")
+            workers = max(1, min(self.config.PARALLEL_PROCESSES, len(chunks)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chunk') as executor:
+                futures = [
+                    executor.submit(self._query_chunk, base_url, model_name, question,
+                                    chunk, part, len(chunks))
+                    for part, chunk in enumerate(chunks, 1)
+                ]
+
+            answers, errors = [], []
+            for future in futures:
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    logging.error(f"Error querying context batch: {str(e)}")
+                    errors.append(e)
+                    continue
+                if answer and answer.strip() != 'NOT_RELEVANT':
+                    answers.append(answer)
+
+            if errors and len(errors) == len(chunks):
+                raise errors[0]
+            if not answers:
+                return "No relevant files were found for this question."
+            if len(answers) == 1:
+                return answers[0]
+            return self._reduce(base_url, model_name, question, answers)
+
         except Exception as e:
             logging.error(f"Error querying Ollama: {str(e)}")
             raise
@@ -0,0 +1,154 @@
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from config import AnalyzerConfig
+
+logger = logging.getLogger('RelevanceFilter')
+
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*|\d+')
+_SUBWORD_RE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+STOPWORDS = frozenset({
+    # English
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for',
+    'from', 'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'should',
+    'so', 'that', 'the', 'this', 'to', 'we', 'what', 'when', 'where', 'which',
+    'why', 'with', 'you', 'file', 'files', 'code', 'project',
+    # JS/TS keywords that appear in nearly every file
+    'const', 'let', 'var', 'function', 'return', 'import', 'export', 'default',
+    'if', 'else', 'true', 'false', 'null', 'undefined', 'new', 'type',
+    'interface', 'props', 'react'
+})
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for ranking. Identifiers are kept whole and also split on
+    camelCase and snake_case, so 'useAuthSession' matches 'auth' and 'session'.
+    """
+    terms = []
+    for identifier in _IDENTIFIER_RE.findall(text):
+        lowered = identifier.lower()
+        if len(lowered) > 1 and lowered not in STOPWORDS:
+            terms.append(lowered)
+        parts = _SUBWORD_RE.findall(identifier)
+        if len(parts) > 1:
+            for part in parts:
+                part = part.lower()
+                if len(part) > 1 and part not in STOPWORDS:
+                    terms.append(part)
+    return terms
+
+class BM25Index:
+    """In-memory Okapi BM25 over tokenized documents"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+
+    def add(self, doc_id: str, terms: Iterable[str]):
+        counts = Counter(terms)
+        self.doc_lengths[doc_id] = sum(counts.values())
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+
+    def scores(self, query_terms: Iterable[str]) -> Dict[str, float]:
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return {}
+        avg_length = sum(self.doc_lengths.values()) / n_docs or 1
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+class RelevanceFilter:
+    """
+    Cheap local pre-filter that picks the files worth sending to the model.
+    Files are ranked by BM25 against the question (path terms weigh more than
+    content), optionally fused with embedding similarity, then the import
+    neighbours of the best matches are pulled in so a component's hooks and
+    styles are not lost. BM25 scores come from the persistent SearchIndex when
+    one is given and available; otherwise an in-memory index is built per query.
+    """
+
+    def __init__(self, config: AnalyzerConfig, dependency_analyzer=None, search_index=None):
+        self.config = config
+        self.dependency_analyzer = dependency_analyzer
+        self.search_index = search_index
+
+    @staticmethod
+    def fuse(*rankings: Dict[str, float], k: int = 60) -> Dict[str, float]:
+        """Reciprocal rank fusion, so BM25 and cosine scores can be combined despite their scales"""
+        fused: Dict[str, float] = defaultdict(float)
+        for scores in rankings:
+            ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            for rank, (file_path, _) in enumerate(ordered):
+                fused[file_path] += 1 / (k + rank + 1)
+        return fused
+
+    def rank(self, contents: Dict[str, str], question: str,
+             semantic_scores: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Score every file against the question; files with no evidence are left out"""
+        scores = {}
+        query_terms = tokenize(question)
+        if self.search_index is not None and self.search_index.available:
+            limit = max(self.config.RELEVANCE_TOP_K, 1) * 4
+            scores = {
+                path: score for path, score in self.search_index.search(question, limit).items()
+                if path in contents
+            }
+        elif query_terms:
+            index = BM25Index()
+            for file_path, content in contents.items():
+                path_terms = tokenize(file_path.replace('\\', '/'))
+                index.add(file_path, tokenize(content) + path_terms * self.config.RELEVANCE_PATH_WEIGHT)
+            scores = index.scores(query_terms)
+
+        if semantic_scores:
+            semantic_scores = {path: score for path, score in semantic_scores.items() if path in contents}
+            scores = self.fuse(scores, semantic_scores) if scores else dict(semantic_scores)
+
+        if self.dependency_analyzer is not None and scores:
+            # Neighbours inherit a share of their best-scoring seed's relevance
+            seeds = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            for file_path, score in seeds[:self.config.RELEVANCE_TOP_K or len(seeds)]:
+                for neighbour in self.dependency_analyzer.get_related_files(file_path, depth=2):
+                    if neighbour in contents:
+                        inherited = score * self.config.RELEVANCE_NEIGHBOR_WEIGHT
+                        if inherited > scores.get(neighbour, 0.0):
+                            scores[neighbour] = inherited
+        return scores
+
+    def select(self, contents: Dict[str, str], question: str, top_k: Optional[int] = None,
+               semantic_scores: Optional[Dict[str, float]] = None) -> List[str]:
+        """
+        Return up to top_k candidate files, best first. top_k of 0 disables the
+        filter. semantic_scores (e.g. from EmbeddingIndex.file_scores) are fused
+        with the BM25 ranking. When nothing in the project matches the question
+        every file is returned, since there is no evidence to filter on.
+        """
+        top_k = self.config.RELEVANCE_TOP_K if top_k is None else top_k
+        if top_k <= 0 or len(contents) <= top_k:
+            return list(contents)
+
+        scores = self.rank(contents, question, semantic_scores)
+        if not scores:
+            logger.info("No files matched the question terms; analyzing every file")
+            return list(contents)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        selected = [file_path for file_path, _ in ranked[:top_k]]
+        logger.info(f"Selected {len(selected)} of {len(contents)} files for analysis")
+        return selected
@@ -0,0 +1,148 @@
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from cache_manager import CacheManager
+from relevance_filter import tokenize
+
+logger = logging.getLogger('SearchIndex')
+
+class SearchIndex:
+    """
+    Persistent BM25 index over project files in an SQLite FTS5 table in
+    cache.db. Text is tokenized in Python with relevance_filter.tokenize
+    (identifiers kept whole and split on camelCase/PascalCase/snake_case), so
+    FTS5 only stores and ranks the terms. Each file is indexed in three
+    columns, weighted path > symbols > content, where symbols are the
+    exports, components and hooks DependencyAnalyzer finds. When the SQLite
+    build has no FTS5 the index is marked unavailable, indexes nothing, and
+    RelevanceFilter ranks with its in-memory BM25 instead.
+    """
+
+    PATH_WEIGHT = 3.0
+    SYMBOL_WEIGHT = 2.0
+    CONTENT_WEIGHT = 1.0
+
+    def __init__(self, cache_dir: Path, dependency_analyzer=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "cache.db"
+        self.dependency_analyzer = dependency_analyzer
+        self.available = True
+
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_database()
+
+    def init_database(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_files (
+                    id INTEGER PRIMARY KEY,
+                    file_path TEXT UNIQUE,
+                    content_hash TEXT
+                )
+            """)
+        try:
+            # '_' and '$' are part of JS identifiers, so FTS5 must not split on them
+            with self.conn:
+                self.conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                        path, symbols, content,
+                        tokenize = "unicode61 tokenchars '_$'"
+                    )
+                """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite has no FTS5 ({e}); falling back to in-memory BM25")
+            self.available = False
+
+    def _document(self, file_path: str, content: str):
+        path_terms = tokenize(file_path.replace('\\', '/'))
+        symbols = []
+        if self.dependency_analyzer is not None:
+            info = self.dependency_analyzer.analyze_file(file_path, content)
+            for name in info.exports + info.components + info.hooks:
+                symbols.extend(tokenize(name))
+        return ' '.join(path_terms), ' '.join(symbols), ' '.join(tokenize(content))
+
+    def apply_changes(self, changed: Dict[str, tuple], removed: Iterable[str] = ()):
+        """
+        Index changed files and drop removed ones in one transaction.
+        changed maps file_path -> (content_hash, content).
+        """
+        with self.conn:
+            for file_path in list(removed) + list(changed):
+                row = self.conn.execute(
+                    "SELECT id FROM search_files WHERE file_path = ?", (file_path,)
+                ).fetchone()
+                if row:
+                    self.conn.execute("DELETE FROM search_fts WHERE rowid = ?", row)
+                    self.conn.execute("DELETE FROM search_files WHERE id = ?", row)
+
+            for file_path, (content_hash, content) in changed.items():
+                cursor = self.conn.execute(
+                    "INSERT INTO search_files (file_path, content_hash) VALUES (?, ?)",
+                    (file_path, content_hash)
+                )
+                self.conn.execute(
+                    "INSERT INTO search_fts (rowid, path, symbols, content) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, *self._document(file_path, content))
+                )
+
+    def sync(self, content_hashes: Dict[str, str], read_content: Callable[[str], Optional[str]]) -> int:
+        """
+        Bring the index in line with the scanner's file list (path -> content hash).
+        Only new or changed files are read, through read_content. Returns the
+        number of files (re)indexed.
+        """
+        if not self.available:
+            return 0
+        stored = dict(self.conn.execute("SELECT file_path, content_hash FROM search_files"))
+        removed = [file_path for file_path in stored if file_path not in content_hashes]
+
+        changed = {}
+        for file_path, content_hash in content_hashes.items():
+            if stored.get(file_path) == content_hash:
+                continue
+            content = read_content(file_path)
+            if content is not None:
+                changed[file_path] = (content_hash, content)
+
+        if changed or removed:
+            logger.info(f"Updating search index: {len(changed)} changed, {len(removed)} removed")
+            self.apply_changes(changed, removed)
+        return len(changed)
+
+    def update(self, contents: Dict[str, str], content_hashes: Optional[Dict[str, str]] = None) -> int:
+        """Sync the index with files already in memory (path -> content)"""
+        if content_hashes is None:
+            content_hashes = {path: CacheManager.hash_content(content) for path, content in contents.items()}
+        return self.sync(content_hashes, contents.get)
+
+    def search(self, question: str, limit: int = 100) -> Dict[str, float]:
+        """BM25 scores (higher is better) for the best matching files; empty when unavailable"""
+        if not self.available:
+            return {}
+        terms = list(dict.fromkeys(tokenize(question)))
+        if not terms:
+            return {}
+
+        # Quoted terms are taken literally, so query syntax in the question is harmless
+        query = ' OR '.join('"' + term.replace('"', '""') + '"' for term in terms)
+        rows = self.conn.execute(
+            """
+            SELECT f.file_path, bm25(search_fts, ?, ?, ?) AS score
+            FROM search_fts JOIN search_files f ON f.id = search_fts.rowid
+            WHERE search_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (self.PATH_WEIGHT, self.SYMBOL_WEIGHT, self.CONTENT_WEIGHT, query, limit)
+        )
+        # FTS5 bm25() is negative, lower meaning more relevant
+        return {file_path: -score for file_path, score in rows}
+
+    def close(self):
+        self.conn.close()
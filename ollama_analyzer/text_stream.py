@@ -0,0 +1,57 @@
+import threading
+import tkinter as tk
+from typing import List, Optional
+
+class TextStreamWriter:
+    """
+    Batches streamed tokens into a Tk text widget.
+    write() may be called from any thread; the widget is only touched from
+    the Tk event loop, once per interval, via root.after.
+    """
+
+    def __init__(self, root: tk.Misc, text_widget: tk.Text, interval_ms: int = 50,
+                 readonly: bool = False):
+        self.root = root
+        self.text_widget = text_widget
+        self.interval_ms = interval_ms
+        self.readonly = readonly
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._replace_with: Optional[str] = None
+        self.root.after(self.interval_ms, self._flush)
+
+    def write(self, token: str):
+        with self._lock:
+            self._buffer.append(token)
+
+    def close(self, replace_with: Optional[str] = None):
+        """Flush what is left; optionally replace the streamed text with a final version"""
+        with self._lock:
+            self._closed = True
+            self._replace_with = replace_with
+
+    def _flush(self):
+        with self._lock:
+            chunk = "".join(self._buffer)
+            self._buffer.clear()
+            closed = self._closed
+            replace_with = self._replace_with
+
+        try:
+            if chunk:
+                self.text_widget.insert(tk.END, chunk)
+                self.text_widget.see(tk.END)
+
+            if closed:
+                if replace_with is not None:
+                    self.text_widget.delete('1.0', tk.END)
+                    self.text_widget.insert('1.0', replace_with)
+                if self.readonly:
+                    self.text_widget.config(state='disabled')
+                return
+        except tk.TclError:
+            # The widget was destroyed (e.g. its window was closed)
+            return
+
+        self.root.after(self.interval_ms, self._flush)
@@ -1,7 +1,11 @@
 import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Set
+from collections.abc import Mapping
+from typing import List, Dict, Set, Iterator, Tuple, Optional, Callable
 from config import AnalyzerConfig
+from file_matcher import FileMatcher
+from ignore_rules import IgnoreRules
 import logging
 
 logger = logging.getLogger('FileScanner')
@@ -14,70 +18,149 @@ def format_size(size_in_bytes: float) -> str:
         size_in_bytes /= 1024.0
     return f"{size_in_bytes:.2f} TB"
 
-def scan_directory_structure(directory: Path, indent: str = "") -> None:
-    """Debug function to print actual directory structure"""
-    try:
-        for item in directory.iterdir():
-            if item.is_file():
-                logger.debug(f"{indent}FILE: {item.name}")
-            elif item.is_dir():
-                logger.debug(f"{indent}DIR: {item.name}/")
-                scan_directory_structure(item, indent + "  ")
-    except Exception as e:
-        logger.error(f"Error scanning directory {directory}: {e}")
+class LazyContents(Mapping):
+    """
+    Read-only path -> content mapping over a fixed set of project files that
+    reads each file on first access and keeps it. Lets callers that only
+    need a few files (the changed ones) take the whole file set without the
+    whole tree being read. get() returns None for unreadable files.
+    """
 
-def get_project_files(project_path: Path, config: AnalyzerConfig) -> List[str]:
-    """Enhanced recursive file scanning with detailed logging"""
-    files = []
-    logger.info(f"Starting deep scan of project at: {project_path}")
-    
-    # First, log the complete directory structure for debugging
-    logger.debug("Full directory structure:")
-    scan_directory_structure(project_path)
-    
-    def process_directory(current_path: Path) -> None:
-        """Recursive function to process directories"""
+    def __init__(self, project_path: Path, files, loaded: Optional[Dict[str, str]] = None):
+        self.project_path = project_path
+        self.files = list(dict.fromkeys(files))
+        self._keys = set(self.files)
+        # Contents the caller already read, e.g. while hashing changed files
+        self._loaded: Dict[str, str] = dict(loaded or {})
+
+    def __getitem__(self, file_path: str) -> str:
+        if file_path not in self._keys:
+            raise KeyError(file_path)
+        if file_path not in self._loaded:
+            with open(self.project_path / file_path, 'r', encoding='utf-8') as f:
+                self._loaded[file_path] = f.read()
+        return self._loaded[file_path]
+
+    def get(self, file_path: str, default=None):
         try:
-            for item in current_path.iterdir():
-                relative_path = item.relative_to(project_path)
-                
-                if item.is_dir():
-                    # Log directory discovery
-                    logger.debug(f"Scanning directory: {relative_path}")
-                    
-                    # Skip ignored directories
-                    if item.name in config.IGNORE_DIRS:
-                        logger.debug(f"Skipping ignored directory: {relative_path}")
+            return self[file_path]
+        except (KeyError, OSError, UnicodeDecodeError):
+            return default
+
+    def __contains__(self, file_path) -> bool:
+        return file_path in self._keys
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def loaded(self) -> int:
+        """How many files have actually been read"""
+        return len(self._loaded)
+
+@dataclass
+class FileRecord:
+    relative_path: str
+    relative_dir: str
+    depth: int
+    size: int
+    extension: str
+
+def iter_project_entries(project_path: Path, config: AnalyzerConfig) -> Iterator[Tuple[str, os.DirEntry, int, bool]]:
+    """
+    Single-pass iterative os.scandir walk yielding (relative_path, entry, depth, is_dir)
+    for every entry, where depth is that of the containing directory (root is 0).
+    Directories in IGNORE_DIRS or matched by the project's .gitignore/.eslintignore
+    files are pruned before descending, and DirEntry type info is used instead of
+    separate is_dir/stat calls.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    ignore_rules = IgnoreRules(project_path)
+    stack = [(str(project_path), "", 0)]
+
+    while stack:
+        current_path, relative_dir, depth = stack.pop()
+        try:
+            with os.scandir(current_path) as it:
+                entries = list(it)
+            ignore_rules.load_directory(relative_dir, [entry.name for entry in entries])
+
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if entry.name in config.IGNORE_DIRS or ignore_rules.is_ignored(relative_path, True):
+                        if debug:
+                            logger.debug(f"{'  ' * depth}DIR: {entry.name}/ (ignored)")
                         continue
-                        
-                    # Recursively process subdirectory
-                    process_directory(item)
+                    if debug:
+                        logger.debug(f"{'  ' * depth}DIR: {entry.name}/")
+                    yield relative_path, entry, depth, True
+                    stack.append((entry.path, relative_path, depth + 1))
                 else:
-                    # Log file discovery
-                    logger.debug(f"Found file: {relative_path}")
-                    
-                    # Check file extension
-                    if item.suffix.lower() in config.SUPPORTED_EXTENSIONS:
-                        # Check file size
-                        try:
-                            file_size = item.stat().st_size
-                            if file_size <= (config.MAX_FILE_SIZE_MB * 1024 * 1024):
-                                logger.info(f"Including file: {relative_path} (size: {format_size(file_size)})")
-                                files.append(str(relative_path))
-                            else:
-                                logger.warning(f"File too large, skipping: {relative_path} (size: {format_size(file_size)})")
-                        except Exception as e:
-                            logger.error(f"Error checking file size for {relative_path}: {e}")
-                    else:
-                        logger.debug(f"Skipping unsupported file type: {relative_path}")
-                        
+                    if ignore_rules.is_ignored(relative_path, False):
+                        if debug:
+                            logger.debug(f"{'  ' * depth}FILE: {entry.name} (ignored)")
+                        continue
+                    if debug:
+                        logger.debug(f"{'  ' * depth}FILE: {entry.name}")
+                    yield relative_path, entry, depth, False
         except Exception as e:
             logger.error(f"Error processing directory {current_path}: {e}")
-    
-    # Start the recursive scan
-    process_directory(project_path)
-    
-    # Log summary
+
+def iter_file_records(project_path: Path, config: AnalyzerConfig,
+                      on_directory: Optional[Callable[[str, int], None]] = None) -> Iterator[FileRecord]:
+    """
+    Yield a FileRecord for every supported file small enough to analyze.
+    on_directory(relative_path, depth) is called for each directory the walk enters,
+    so callers can aggregate directory statistics from the same traversal.
+    """
+    max_size = config.MAX_FILE_SIZE_MB * 1024 * 1024
+    matcher = FileMatcher.from_config(config)
+
+    for relative_path, entry, depth, is_dir in iter_project_entries(project_path, config):
+        if is_dir:
+            if on_directory is not None:
+                on_directory(relative_path, depth)
+            continue
+
+        # Check file extension (compound extensions such as .module.css included)
+        extension = matcher.match_extension(entry.name)
+        if extension is None:
+            continue
+
+        # Skip test, story, minified and other ignored files
+        if matcher.is_ignored(entry.name):
+            logger.debug(f"Skipping ignored file: {relative_path}")
+            continue
+
+        # Check file size
+        try:
+            file_size = entry.stat().st_size
+        except OSError as e:
+            logger.error(f"Error checking file size for {relative_path}: {e}")
+            continue
+
+        if file_size <= max_size:
+            logger.info(f"Including file: {relative_path} (size: {format_size(file_size)})")
+            yield FileRecord(
+                relative_path=relative_path,
+                relative_dir=os.path.dirname(relative_path),
+                depth=depth,
+                size=file_size,
+                extension=extension
+            )
+        else:
+            logger.warning(f"File too large, skipping: {relative_path} (size: {format_size(file_size)})")
+
+def log_file_summary(files: List[str]) -> None:
     logger.info(f"Scan complete. Found {len(files)} files")
     logger.info("Files by extension:")
     extension_count = {}
@@ -86,11 +169,16 @@ def get_project_files(project_path: Path, config: AnalyzerConfig) -> List[str]:
         extension_count[ext] = extension_count.get(ext, 0) + 1
     for ext, count in extension_count.items():
         logger.info(f"  {ext}: {count} files")
-    
+
+def get_project_files(project_path: Path, config: AnalyzerConfig) -> List[str]:
+    """Scan the project once and return the supported files small enough to analyze"""
+    logger.info(f"Starting deep scan of project at: {project_path}")
+    files = [record.relative_path for record in iter_file_records(project_path, config)]
+    log_file_summary(files)
     return sorted(files)
 
 def analyze_project_structure(project_path: Path, config: AnalyzerConfig) -> Dict:
-    """Enhanced project structure analysis with detailed directory info"""
+    """Project statistics and file list built from a single traversal"""
     logger.info(f"Starting project analysis at: {project_path}")
     
     stats = {
@@ -102,62 +190,40 @@ def analyze_project_structure(project_path: Path, config: AnalyzerConfig) -> Dic
         'directory_tree': {},
         'max_depth': 0
     }
-    
-    def analyze_directory(current_path: Path, depth: int = 0) -> None:
-        """Recursive directory analyzer"""
-        nonlocal stats
-        
-        try:
-            # Update max depth
-            stats['max_depth'] = max(stats['max_depth'], depth)
-            
-            # Process all items in directory
-            for item in current_path.iterdir():
-                relative_path = item.relative_to(project_path)
-                
-                if item.is_dir():
-                    if item.name not in config.IGNORE_DIRS:
-                        stats['total_dirs'] += 1
-                        dir_path = str(relative_path)
-                        stats['directory_tree'][dir_path] = {
-                            'depth': depth,
-                            'files': 0,
-                            'size': 0
-                        }
-                        analyze_directory(item, depth + 1)
-                else:
-                    if item.suffix.lower() in config.SUPPORTED_EXTENSIONS:
-                        try:
-                            file_size = item.stat().st_size
-                            if file_size <= (config.MAX_FILE_SIZE_MB * 1024 * 1024):
-                                stats['total_files'] += 1
-                                stats['total_size'] += file_size
-                                
-                                # Update extension stats
-                                ext = item.suffix.lower()
-                                stats['by_extension'][ext] = stats['by_extension'].get(ext, 0) + 1
-                                
-                                # Update directory stats
-                                dir_path = str(relative_path.parent)
-                                if dir_path in stats['directory_tree']:
-                                    stats['directory_tree'][dir_path]['files'] += 1
-                                    stats['directory_tree'][dir_path]['size'] += file_size
-                                
-                                stats['by_directory'][dir_path] = stats['by_directory'].get(dir_path, 0) + 1
-                        except Exception as e:
-                            logger.error(f"Error processing file {relative_path}: {e}")
-                            
-        except Exception as e:
-            logger.error(f"Error analyzing directory {current_path}: {e}")
-    
-    # Start recursive analysis
-    analyze_directory(project_path)
+    directories_by_depth = {}
+
+    def add_directory(dir_path: str, depth: int) -> None:
+        stats['total_dirs'] += 1
+        stats['directory_tree'][dir_path] = {
+            'depth': depth,
+            'files': 0,
+            'size': 0
+        }
+        directories_by_depth[depth] = directories_by_depth.get(depth, 0) + 1
+        stats['max_depth'] = max(stats['max_depth'], depth + 1)
+
+    files = []
+    for record in iter_file_records(project_path, config, on_directory=add_directory):
+        files.append(record.relative_path)
+        stats['total_files'] += 1
+        stats['total_size'] += record.size
+
+        # Update extension stats
+        stats['by_extension'][record.extension] = stats['by_extension'].get(record.extension, 0) + 1
+
+        # Update directory stats
+        dir_path = record.relative_dir or '.'
+        if dir_path in stats['directory_tree']:
+            stats['directory_tree'][dir_path]['files'] += 1
+            stats['directory_tree'][dir_path]['size'] += record.size
+
+        stats['by_directory'][dir_path] = stats['by_directory'].get(dir_path, 0) + 1
     
     # Add directory depth information to stats
     stats['directory_depth'] = {
         'max_depth': stats['max_depth'],
         'directories_by_depth': {
-            depth: len([d for d, info in stats['directory_tree'].items() if info['depth'] == depth])
+            depth: directories_by_depth.get(depth, 0)
             for depth in range(stats['max_depth'] + 1)
         }
     }
@@ -173,9 +239,9 @@ def analyze_project_structure(project_path: Path, config: AnalyzerConfig) -> Dic
         logger.info(f"  {'  ' * (info['depth'] + 1)}Files: {info['files']}")
         logger.info(f"  {'  ' * (info['depth'] + 1)}Size: {format_size(info['size'])}")
     
-    files = get_project_files(project_path, config)
+    log_file_summary(files)
     
     return {
         'stats': stats,
-        'files': files
-    }
\ No newline at end of file
+        'files': sorted(files)
+    }
@@ -10,6 +10,9 @@ current_dir = Path(__file__).parent
 src_dir = current_dir / "src"
 sys.path.append(str(src_dir))
 
+# Shared pooled Ollama client lives in the sibling analyzer package
+sys.path.append(str(current_dir.parent / "ollama_analyzer"))
+
 from src.gui.main_window import APIGeneratorGUI
 from src.config.analyzer_config import AnalyzerConfig
 
@@ -9,6 +9,9 @@ import time
 from time import sleep
 import os
 
+from ollama_client import get_client, GenerationCancelled
+from ignore_rules import walk_project
+
 
 @dataclass
 class CodeGenerationConfig:
@@ -152,8 +155,13 @@ class SmartCodeGenerator:
         return similar
 
     def generate_code_with_ollama(self, entity_path: str, entity_content: str, 
-                            generation_type: str, retry_count: int = 0) -> str:
-        """Generate code using Ollama with project context and retries"""
+                            generation_type: str, retry_count: int = 0,
+                            on_token=None, cancel_event=None) -> str:
+        """
+        Generate code using Ollama with project context and retries.
+        When on_token is given the response is streamed and each token is passed
+        to it as it arrives; setting cancel_event aborts the stream.
+        """
         try:
             context = self._prepare_generation_context(entity_path, entity_content, generation_type)
             
@@ -180,16 +188,21 @@ class SmartCodeGenerator:
 
             # Query Ollama using the generate endpoint
             self.logger.debug(f"Sending request to {self.config.OLLAMA_BASE_URL}/api/generate")
-            response = requests.post(
-                f"{self.config.OLLAMA_BASE_URL}/api/generate",
-                json=request_data,
-                timeout=120
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            generated_code = result.get('response', '')
+            client = get_client(self.config.OLLAMA_BASE_URL, self.config)
+            if on_token is None:
+                result = client.post_json('/api/generate', request_data)
+                generated_code = result.get('response', '')
+            else:
+                tokens = []
+                for token in client.generate_stream(
+                    request_data["model"],
+                    request_data["prompt"],
+                    options=request_data["options"],
+                    cancel_event=cancel_event
+                ):
+                    tokens.append(token)
+                    on_token(token)
+                generated_code = ''.join(tokens)
             clean_code = self._extract_code_from_response(generated_code)
             
             if not self._validate_generated_code(clean_code, generation_type):
@@ -197,20 +210,19 @@ class SmartCodeGenerator:
                 
             return clean_code
 
+        except GenerationCancelled:
+            raise
         except requests.exceptions.ConnectionError:
+            # The shared client has already retried with backoff
             self.logger.error("Cannot connect to Ollama server. Please ensure Ollama is running.")
-            if retry_count < self.config.MAX_RETRIES:
-                sleep(self.config.RETRY_DELAY * (retry_count + 1))
-                return self.generate_code_with_ollama(
-                    entity_path, entity_content, generation_type, retry_count + 1
-                )
             raise
         except Exception as e:
             self.logger.error(f"Error generating {generation_type}: {str(e)}")
             if retry_count < self.config.MAX_RETRIES:
                 sleep(self.config.RETRY_DELAY * (retry_count + 1))
                 return self.generate_code_with_ollama(
-                    entity_path, entity_content, generation_type, retry_count + 1
+                    entity_path, entity_content, generation_type, retry_count + 1,
+                    on_token=on_token, cancel_event=cancel_event
                 )
             raise
 
@@ -1104,11 +1116,12 @@ Requirements:
                 'patterns': {}
             }
             
-            # Scan project recursively
-            for root, _, files in os.walk(source_path):
+            # Scan project recursively, pruning ignored directories and .gitignore matches
+            ignore_dirs = {'node_modules', '.git'} | set(getattr(self.config, 'IGNORE_DIRS', ()))
+            for relative_dir, _, files in walk_project(source_path, ignore_dirs):
                 for file in files:
-                    file_path = Path(root) / file
-                    relative_path = file_path.relative_to(source_path)
+                    relative_path = Path(relative_dir) / file
+                    file_path = source_path / relative_path
                     
                     content = self._read_file_content(str(file_path))
                     if content is None:
@@ -12,6 +12,8 @@ import os
 from src.generators.code_generator import SmartCodeGenerator
 from src.config.analyzer_config import AnalyzerConfig
 from src.generators.entity_analyzer import EntityAnalyzer
+from ollama_client import GenerationCancelled, close_clients
+from text_stream import TextStreamWriter
 
 class APIGeneratorGUI:
     """GUI for Next.js API Generator"""
@@ -321,35 +323,62 @@ class APIGeneratorGUI:
             preview.title(f"Preview: {entity_path}")
             preview.geometry("800x600")
             
+            # Closing the window cancels any generation still streaming
+            cancel_event = threading.Event()
+            def close_preview():
+                cancel_event.set()
+                preview.destroy()
+            preview.protocol("WM_DELETE_WINDOW", close_preview)
+            
             # Add tabs for different generations
             notebook = ttk.Notebook(preview)
             notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
             
-            # Generate previews
+            streams = []
             for gen_type in ['dto', 'service', 'controller']:
                 if getattr(self.config, f'GENERATE_{gen_type.upper()}S', True):
-                    try:
-                        code = self.code_generator.generate_code_with_ollama(
-                            entity_path,
-                            content,
-                            gen_type
-                        )
-                        
-                        frame = ttk.Frame(notebook)
-                        notebook.add(frame, text=gen_type.capitalize())
-                        
-                        text = scrolledtext.ScrolledText(frame)
-                        text.pack(fill=tk.BOTH, expand=True)
-                        text.insert('1.0', code)
-                        text.config(state='disabled')
-                        
-                    except Exception as e:
-                        self.log_message(f"Error generating preview for {gen_type}: {str(e)}")
+                    frame = ttk.Frame(notebook)
+                    notebook.add(frame, text=gen_type.capitalize())
+                    
+                    text = scrolledtext.ScrolledText(frame)
+                    text.pack(fill=tk.BOTH, expand=True)
+                    streams.append((gen_type, TextStreamWriter(self.root, text, readonly=True)))
+            
+            # Generate previews in the background, streaming tokens into each tab
+            thread = threading.Thread(
+                target=self.stream_previews,
+                args=(entity_path, content, streams, cancel_event)
+            )
+            thread.daemon = True
+            thread.start()
             
         except Exception as e:
             self.log_message(f"Error creating preview: {str(e)}")
             messagebox.showerror("Error", f"Failed to create preview: {str(e)}")
 
+    def stream_previews(self, entity_path: str, content: str, streams: List, cancel_event: threading.Event):
+        """Generate each preview in turn, streaming into its tab"""
+        for gen_type, writer in streams:
+            if cancel_event.is_set():
+                writer.close()
+                continue
+            try:
+                code = self.code_generator.generate_code_with_ollama(
+                    entity_path,
+                    content,
+                    gen_type,
+                    on_token=writer.write,
+                    cancel_event=cancel_event
+                )
+                # Replace the raw stream with the cleaned-up code
+                writer.close(replace_with=code)
+                
+            except GenerationCancelled:
+                writer.close()
+            except Exception as e:
+                writer.close()
+                self.log_message(f"Error generating preview for {gen_type}: {str(e)}")
+
     def start_generation(self):
         """Start the generation process in a separate thread"""
         if not self.is_connected:
@@ -477,8 +506,10 @@ class APIGeneratorGUI:
             if messagebox.askokcancel("Quit", "Generation is in progress. Do you want to stop and quit?"):
                 self.is_generating = False
                 time.sleep(0.5)  # Give time for threads to clean up
+                close_clients()
                 self.root.destroy()
         else:
+            close_clients()
             self.root.destroy()
             
     def validate_paths(self) -> bool:
@@ -1,11 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import os
+import sys
 import json
 import requests
 from typing import Optional
 import threading
 import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ollama_analyzer'))
+from ollama_client import close_clients, get_client
+from ignore_rules import walk_project
 import logging
 from datetime import datetime
 
@@ -190,30 +195,27 @@ class OllamaAnalyzerGUI:
         
         enabled_extensions = [f".{ext}" for ext, var in self.file_filters.items() if var.get()]
         
-        for root, dirs, filenames in os.walk(self.project_path.get()):
-            # Remove ignored directories
-            dirs[:] = [d for d in dirs if d not in ignore_dirs]
-            
+        # Ignored directories and .gitignore/.eslintignore matches are pruned by the walk
+        for relative_dir, dirs, filenames in walk_project(self.project_path.get(), ignore_dirs):
             for filename in filenames:
                 if any(filename.endswith(ext) for ext in ignore_extensions):
                     continue
                     
                 if any(filename.endswith(ext) for ext in enabled_extensions):
-                    full_path = os.path.join(root, filename)
-                    relative_path = os.path.relpath(full_path, self.project_path.get())
-                    files.append(relative_path)
+                    files.append(os.path.join(relative_dir, filename))
                     
         return files
 
     def connect_to_ollama(self):
         self.logger.info("Attempting to connect to Ollama...")
         try:
-            response = requests.get(f"{self.base_url.get()}/api/version")
+            client = get_client(self.base_url.get(), timeout=None)
+            response = client.request('GET', '/api/version', retry=False)
             if response.status_code == 200:
                 self.logger.info("Successfully connected to Ollama service")
                 
-                model_response = requests.post(
-                    f"{self.base_url.get()}/api/generate",
+                model_response = client.request(
+                    'POST', '/api/generate',
                     json={"model": self.model_name.get(), "prompt": "test", "stream": False}
                 )
                 
@@ -331,7 +333,7 @@ class OllamaAnalyzerGUI:
             
     def query_ollama(self, content: str, file_path: str, question: str) -> str:
         """Query Ollama with file content and question"""
-        url = f"{self.base_url.get()}/api/generate"
+        client = get_client(self.base_url.get(), timeout=None)
         
         system_prompt = f"""You are analyzing the file {file_path} from a Next.js project.
 Focus on providing specific, actionable insights related to the question.
@@ -350,15 +352,7 @@ If this file is not relevant to the question, respond with 'NOT_RELEVANT'.
 """
 
         try:
-            response = requests.post(url, json={
-                "model": self.model_name.get(),
-                "prompt": prompt,
-                "system": system_prompt,
-                "stream": False
-            })
-            
-            response.raise_for_status()
-            result = response.json()['response']
+            result = client.generate(self.model_name.get(), prompt, system=system_prompt)
             
             # Only return result if it's relevant
             if result.strip() != 'NOT_RELEVANT':
@@ -373,11 +367,7 @@ If this file is not relevant to the question, respond with 'NOT_RELEVANT'.
             
     def verify_connection(self) -> bool:
         """Verify connection to Ollama is still active"""
-        try:
-            response = requests.get(f"{self.base_url.get()}/api/version")
-            return response.status_code == 200
-        except:
-            return False
+        return get_client(self.base_url.get(), timeout=None).is_available()
             
     def start_analysis(self):
         """Start or stop analysis"""
@@ -411,6 +401,7 @@ def main():
             if app.is_analyzing:
                 app.is_analyzing = False
                 time.sleep(1)  # Give time for analysis to stop
+            close_clients()
             root.destroy()
             
     root.protocol("WM_DELETE_WINDOW", on_closing)